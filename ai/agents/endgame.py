@@ -0,0 +1,128 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from game.cards import CARDS, CARD_POINTS_BY_ID, TRICK_WINNER
+from game.state import (cards_in, mask_of, zobrist_hash, NO_CARD, HAND0, HAND1, TRUMP, LEADER, LEAD,
+                        ZOBRIST_HAND, ZOBRIST_LEAD, ZOBRIST_LEADER)
+from ai.agents.rule_based import RuleBasedPlayer
+
+"""
+Exact endgame solver.
+
+Once the deck is empty every card still unseen is in the opponent's hand, so
+the last tricks are a perfect-information game. solve() runs alpha-beta
+minimax over the compact state (game/state.py) and memoizes positions in a
+transposition table keyed by their Zobrist hash (remaining cards, card led,
+leader, trump). Values are the points seat 0 still wins from the position, so
+entries are independent of the current score and of who is asking.
+
+EndgameSolverMixin turns any agent into one that plays those tricks
+optimally: class MyAgent(EndgameSolverMixin, RuleBasedPlayer).
+"""
+
+EXACT, LOWER, UPPER = 0, 1, 2
+_tt = {}  # zobrist hash → (flag, value, best card)
+TT_MAX_ENTRIES = 1 << 20
+
+
+def _search(h0, h1, leader, lead, trump, key, alpha, beta):
+    """Points seat 0 wins from this position under optimal play by both sides."""
+    if not h0 and not h1:
+        return 0, NO_CARD
+
+    entry = _tt.get(key)
+    if entry is not None:
+        flag, value, move = entry
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value, move
+
+    alpha0, beta0 = alpha, beta
+    seat = leader if lead == NO_CARD else 1 - leader
+    maximizing = seat == 0
+    best = -1 if maximizing else 1 << 30
+    best_move = NO_CARD
+
+    for card in cards_in(h0 if seat == 0 else h1):
+        bit = 1 << card
+        n0, n1 = (h0 ^ bit, h1) if seat == 0 else (h0, h1 ^ bit)
+        if lead == NO_CARD:
+            value, _ = _search(n0, n1, leader, card, trump,
+                               key ^ ZOBRIST_HAND[seat][card] ^ ZOBRIST_LEAD[card], alpha, beta)
+        else:
+            winner = 1 - leader if TRICK_WINNER[lead][card][trump] else leader
+            gain = CARD_POINTS_BY_ID[lead] + CARD_POINTS_BY_ID[card] if winner == 0 else 0
+            child_key = key ^ ZOBRIST_HAND[seat][card] ^ ZOBRIST_LEAD[lead]
+            if winner != leader:
+                child_key ^= ZOBRIST_LEADER
+            value, _ = _search(n0, n1, winner, NO_CARD, trump, child_key, alpha - gain, beta - gain)
+            value += gain
+
+        if maximizing:
+            if value > best:
+                best, best_move = value, card
+            alpha = max(alpha, best)
+        else:
+            if value < best:
+                best, best_move = value, card
+            beta = min(beta, best)
+        if alpha >= beta:
+            break
+
+    if best <= alpha0:
+        flag = UPPER
+    elif best >= beta0:
+        flag = LOWER
+    else:
+        flag = EXACT
+    if len(_tt) >= TT_MAX_ENTRIES:
+        _tt.clear()
+    _tt[key] = (flag, best, best_move)
+    return best, best_move
+
+
+def solve(state):
+    """
+    Solve a compact state with an empty stock.
+    Returns (points seat 0 still wins, best card id for the player to move).
+    """
+    return _search(state[HAND0], state[HAND1], state[LEADER], state[LEAD], state[TRUMP],
+                   zobrist_hash(state), -1, 1 << 30)
+
+
+def endgame_state(player):
+    """Compact state seen by `player` once the deck is empty: the opponent holds every unseen card."""
+    game = player.game
+    seen = mask_of(game.played_cards) | mask_of(game.table) | mask_of(player.hand)
+    unseen = ((1 << len(CARDS)) - 1) ^ seen
+    hands = (mask_of(player.hand), unseen) if player.seat == 0 else (unseen, mask_of(player.hand))
+    lead = game.table[0].id if game.table else NO_CARD
+    return (hands[0], hands[1], (), 0, game.briscola_index, 0, 0, game.starting_player_index, lead)
+
+
+class EndgameSolverMixin:
+    """Overrides play_card with the exact solver once the deck is exhausted."""
+    def play_card(self):
+        game = self.game
+        if game is None or not game.deck.is_empty() or not self.hand:
+            return super().play_card()
+        _, card = solve(endgame_state(self))
+        for i, c in enumerate(self.hand):
+            if c.id == card:
+                return self.hand.pop(i)
+        return super().play_card()
+
+
+class EndgameRuleBasedPlayer(EndgameSolverMixin, RuleBasedPlayer):
+    pass
+
+
+_endgame_classes = {}
+
+def with_endgame_solver(player_cls):
+    """Subclass of player_cls that switches to the exact solver once the deck is empty."""
+    cls = _endgame_classes.get(player_cls)
+    if cls is None:
+        cls = type(f"Endgame{player_cls.__name__}", (EndgameSolverMixin, player_cls), {})
+        _endgame_classes[player_cls] = cls
+    return cls
@@ -0,0 +1,197 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import math
+import time
+import random
+import atexit
+from multiprocessing import Pool
+
+from game.player import Player
+from game.cards import N_CARDS
+from game.state import (apply_move, legal_moves, to_move, cards_in, mask_of, NO_CARD,
+                        SCORE0, SCORE1, STOCK, DRAW_POS, HAND0, HAND1)
+from ai.agents.endgame import solve
+
+"""
+Information-Set Monte Carlo Tree Search (single-observer ISMCTS).
+
+Every iteration samples a determinization: the unseen cards are dealt at
+random to the opponent's hand and to the stock (the face-up briscola stays at
+the bottom), consistently with everything the player has seen. The iteration
+then descends one shared tree keyed by card ids, considering only the moves
+legal in that determinization (UCB with availability counts), and finishes
+with a random rollout on the compact state of game/state.py. Once the stock
+is empty the rollout is replaced by the exact endgame solver.
+
+With workers > 1 the iterations are split over a process pool; each worker
+grows its own tree and the root visit counts are summed.
+"""
+
+# Information set: what `seat` knows when it has to move
+# (seat, own hand mask, unseen mask, opponent hand size, stock size, briscola card id,
+#  trump, score0, score1, leader, card led)
+
+
+def information_set(player):
+    game = player.game
+    opponent = game.players[1 - player.seat]
+    own = mask_of(player.hand)
+    seen = own | mask_of(game.played_cards) | mask_of(game.table)
+    unseen = ((1 << N_CARDS) - 1) ^ seen
+    lead = game.table[0].id if game.table else NO_CARD
+    return (player.seat, own, unseen, len(opponent.hand), len(game.deck), game.briscola_card.id,
+            game.briscola_index, game.scores[game.players[0].name], game.scores[game.players[1].name],
+            game.starting_player_index, lead)
+
+
+def determinize(info, rng):
+    """Sample a full compact state consistent with the information set."""
+    seat, own, unseen, opp_size, stock_size, briscola, trump, score0, score1, leader, lead = info
+    cards = cards_in(unseen)
+    if stock_size:
+        cards.remove(briscola)  # still at the bottom of the deck
+    rng.shuffle(cards)
+    opp = 0
+    for card in cards[:opp_size]:
+        opp |= 1 << card
+    stock = tuple(cards[opp_size:]) + ((briscola,) if stock_size else ())
+    hands = (own, opp) if seat == 0 else (opp, own)
+    return (hands[0], hands[1], stock, 0, trump, score0, score1, leader, lead)
+
+
+def _result(scores, seat):
+    mine, theirs = scores[seat], scores[1 - seat]
+    return 1.0 if mine > theirs else 0.5 if mine == theirs else 0.0
+
+
+def rollout(state, rng, exact_endgame=True):
+    """Play random moves to the end; returns the final (score0, score1)."""
+    while state[HAND0] or state[HAND1]:
+        if exact_endgame and state[DRAW_POS] >= len(state[STOCK]):
+            remaining = 120 - state[SCORE0] - state[SCORE1]
+            won0, _ = solve(state)
+            return state[SCORE0] + won0, state[SCORE1] + remaining - won0
+        state = apply_move(state, rng.choice(legal_moves(state)))
+    return state[SCORE0], state[SCORE1]
+
+
+class Node:
+    __slots__ = ("seat", "children", "visits", "reward", "avail")
+
+    def __init__(self, seat):
+        self.seat = seat  # seat that played the move leading to this node
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.avail = 1
+
+
+def search(info, iterations=1000, time_limit=None, exploration=0.7, seed=None, exact_endgame=True):
+    """
+    Run ISMCTS from an information set; returns {card id: root visit count}.
+    Stops after `iterations` or `time_limit` seconds, whichever comes first (at least one must be set).
+    """
+    rng = random.Random(seed)
+    root = Node(seat=1 - info[0])
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    i = 0
+    while True:
+        if (iterations and i >= iterations) or (deadline and time.perf_counter() >= deadline):
+            break
+        i += 1
+        state = determinize(info, rng)
+        node = root
+        path = [root]
+
+        # Selection / expansion restricted to the moves legal in this determinization
+        while state[HAND0] or state[HAND1]:
+            moves = legal_moves(state)
+            untried = []
+            for move in moves:
+                child = node.children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.avail += 1
+            if untried:
+                move = rng.choice(untried)
+                child = node.children[move] = Node(to_move(state))
+                state = apply_move(state, move)
+                path.append(child)
+                break
+            best, best_score = None, -1.0
+            for move in moves:
+                child = node.children[move]
+                score = child.reward / child.visits + exploration * math.sqrt(math.log(child.avail) / child.visits)
+                if score > best_score:
+                    best, best_score = move, score
+            node = node.children[best]
+            state = apply_move(state, best)
+            path.append(node)
+
+        scores = rollout(state, rng, exact_endgame)
+        for node in path:
+            node.visits += 1
+            node.reward += _result(scores, node.seat)
+
+    return {move: child.visits for move, child in root.children.items()}
+
+
+def _search_task(args):
+    return search(*args)
+
+
+_pools = {}
+
+def _get_pool(workers):
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = Pool(workers)
+        atexit.register(pool.terminate)
+    return pool
+
+
+def parallel_search(info, iterations=1000, time_limit=None, workers=1, exploration=0.7, seed=None,
+                    exact_endgame=True):
+    """Split the search over `workers` processes and sum the root visit counts."""
+    if workers <= 1:
+        return search(info, iterations, time_limit, exploration, seed, exact_endgame)
+    rng = random.Random(seed)
+    per_worker = -(-iterations // workers) if iterations else None
+    tasks = [(info, per_worker, time_limit, exploration, rng.getrandbits(64), exact_endgame)
+             for _ in range(workers)]
+    counts = {}
+    for worker_counts in _get_pool(workers).map(_search_task, tasks):
+        for move, visits in worker_counts.items():
+            counts[move] = counts.get(move, 0) + visits
+    return counts
+
+
+class ISMCTSPlayer(Player):
+    def __init__(self, name="ISMCTS", iterations=1000, time_limit=None, workers=1, exploration=0.7,
+                 seed=None, exact_endgame=True):
+        """iterations and/or time_limit (seconds) bound the search of each move."""
+        super().__init__(name)
+        if not iterations and not time_limit:
+            raise ValueError("ISMCTSPlayer needs an iteration or time budget.")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.exact_endgame = exact_endgame
+        self.rng = random.Random(seed)
+
+    def play_card(self):
+        if not self.hand:
+            return None
+        if len(self.hand) == 1:
+            return self.hand.pop()
+        counts = parallel_search(information_set(self), self.iterations, self.time_limit, self.workers,
+                                 self.exploration, self.rng.getrandbits(64), self.exact_endgame)
+        best = max(counts, key=counts.get)
+        for i, card in enumerate(self.hand):
+            if card.id == best:
+                return self.hand.pop(i)
+        return self.hand.pop(0)
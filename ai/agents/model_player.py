@@ -3,23 +3,50 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from game.player import Player
+from ai.observation import ObservationBuffer, observe
+from ai.canonical import canonicalize
 import numpy as np
-import torch
 
 class ModelPlayer(Player):
-    def __init__(self, model, name="Model_AI"):
+    def __init__(self, model, name="Model_AI", cache=None):
         super().__init__(name)
+        # a torch network, an InferenceBroker shared by concurrent games, or a
+        # NumpyCNNBriscolaModel (accepts_numpy: torch is never imported)
         self.model = model
+        # optional PolicyCache (an opening book): outputs in canonical slot order,
+        # shared by equivalent positions; a miss runs the model (ai/policy_cache.py)
+        self.cache = cache
+        self.history = ObservationBuffer()
+        self._history_game = None
 
-    def encode_state(self):
-        # Normalizza per sicurezza
-        return torch.tensor([card.value / 10 for card in self.hand] + [0] * (3 - len(self.hand)), dtype=torch.float32)
+    def encode_state(self) -> np.ndarray:
+        # Same 27 features as data/dataset.csv: the last 3 states seen by this player
+        if self.game is not self._history_game:
+            self.history.reset()
+            self._history_game = self.game
+        if self.game is None:
+            return self.history.push(self.hand, 0)
+        return observe(self, self.history)
+
+    def evaluate(self, states: np.ndarray) -> np.ndarray:
+        """Model outputs for (batch, input_dim) observations, as a NumPy array."""
+        if getattr(self.model, "accepts_numpy", False):
+            return self.model(states)
+        import torch
+        with torch.no_grad():
+            return self.model(torch.from_numpy(states)).numpy()
 
     def play_card(self):
         if not self.hand:
             return None
-        state = self.encode_state().unsqueeze(0)  # shape: (1, input_dim)
-        with torch.no_grad():
-            output = self.model(state)
-            action = torch.argmax(output).item()
+        state = self.encode_state()
+        cache = self.cache
+        if cache is not None and not (cache.depth and self.history.pushes > cache.depth):
+            canonical, order = canonicalize(state)
+            output = cache.get(bytes(canonical))
+            if output is not None:
+                # Stored only if the model plays this canonical card in every equivalent position
+                action = int(np.argmax(output))
+                return self.hand.pop(order[action] if action < len(order) else 0)
+        action = int(np.argmax(self.evaluate(state[None])))  # shape: (1, input_dim)
         return self.hand.pop(action if action < len(self.hand) else 0)
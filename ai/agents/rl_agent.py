@@ -0,0 +1,346 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import time
+import random
+from multiprocessing import Pool
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from game.player import Player
+from game.briscola import BriscolaGame
+from game.records import GameRecordReader
+from ai.observation import encode_game_features as encode_observation, GAME_FEATURES
+from ai.agents.rule_based import RuleBasedPlayer
+from ai.models.network import QNetwork
+
+"""
+Self-play reinforcement learning agent (Double DQN with experience replay).
+
+Rollouts are collected by worker processes: every game pits the current
+policy (epsilon-greedy) against an opponent drawn from a pool of past
+checkpoints plus RuleBasedPlayer. While the workers play the next round of
+games, the learner runs large-batch updates on the replay buffer, so
+collection and learning overlap. No weights travel with the tasks: the
+workers' policy network is built over shared-memory tensors that the
+learner overwrites before each round, and a worker loads each opponent
+checkpoint from its file the first time it draws it.
+
+The reward after each decision is the change in (own score - opponent
+score) / 120, so the return of a whole game is the final score margin.
+record_transitions() derives the same transitions, for both seats, from the
+games stored by game/records.py, so archived games can pre-fill the replay
+buffer (train_self_play(records=...)).
+"""
+
+OBS_SIZE = GAME_FEATURES
+NUM_ACTIONS = 3
+MODEL_PATH = "ai/models/rl_agent.pt"
+
+
+def action_mask(obs: np.ndarray) -> np.ndarray:
+    """Valid hand slots, read back from the 'present' features of an observation."""
+    return obs[..., 3:15:5] > 0
+
+
+class RLAgent(Player):
+    def __init__(self, net, name="RL_Agent", epsilon=0.0, record=False, rng=None):
+        super().__init__(name)
+        self.net = net
+        self.epsilon = epsilon
+        self.record = record
+        self.rng = rng or random.Random()
+        self.transitions = []  # (obs, action, reward, next_obs, done) when record=True
+        self._last = None
+        self._margin = 0
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, name="RL_Agent"):
+        from ai import registry
+        return cls(registry.load(path, "qnet"), name)
+
+    def _score_margin(self):
+        game = self.game
+        return game.scores[self.name] - game.scores[game.players[1 - self.seat].name]
+
+    def _close(self, next_obs, done):
+        if self._last is not None:
+            margin = self._score_margin()
+            obs, action = self._last
+            self.transitions.append((obs, action, (margin - self._margin) / 120, next_obs, done))
+            self._margin = margin
+            self._last = None
+
+    def play_card(self):
+        if not self.hand:
+            return None
+        obs = encode_observation(self)
+        n = len(self.hand)
+        if self.epsilon and self.rng.random() < self.epsilon:
+            action = self.rng.randrange(n)
+        else:
+            with torch.no_grad():
+                q = self.net(torch.from_numpy(obs).unsqueeze(0))[0, :n]
+            action = int(torch.argmax(q))
+
+        if self.record:
+            self._close(obs, False)
+            self._last = (obs, action)
+        return self.hand.pop(action)
+
+    def finish(self):
+        """Close the last transition once the game is over."""
+        if self.record:
+            self._close(np.zeros(OBS_SIZE, dtype=np.float32), True)
+
+
+# ----------------------------------------------------------------------------
+# Rollout workers
+# ----------------------------------------------------------------------------
+
+_worker_nets = {}  # opponent checkpoint id → QNetwork, cached per worker
+_learner_net = None  # the current policy, over the learner's shared-memory weights
+
+
+def _init_worker(shared_weights=None):
+    global _learner_net
+    torch.set_num_threads(1)
+    if shared_weights is not None:
+        _learner_net = QNetwork(OBS_SIZE, NUM_ACTIONS)
+        _learner_net.load_state_dict(shared_weights, assign=True)  # parameters are the shared tensors
+        _learner_net.eval()
+
+
+def _net_from(key, path):
+    net = _worker_nets.get(key)
+    if net is None:
+        net = QNetwork(OBS_SIZE, NUM_ACTIONS)
+        net.eval()
+        _worker_nets[key] = net
+        net.load_state_dict(torch.load(path, weights_only=True))
+    return net
+
+
+def rollout(args):
+    """Play n_games of the current policy against sampled opponents; return stacked transitions."""
+    opponents, n_games, epsilon, seed = args
+    rng = random.Random(seed)
+    learner_net = _learner_net
+
+    transitions = []
+    wins = 0
+    for _ in range(n_games):
+        game_rng = random.Random(rng.getrandbits(64))
+        learner = RLAgent(learner_net, "Learner", epsilon=epsilon, record=True, rng=rng)
+        key, opp_path = rng.choice(opponents)
+        if opp_path is None:
+            opponent = RuleBasedPlayer("Opponent")
+        else:
+            opponent = RLAgent(_net_from(key, opp_path), "Opponent")
+        seats = (learner, opponent) if rng.random() < 0.5 else (opponent, learner)
+        game = BriscolaGame(*seats, rng=game_rng)
+        game.play_game()
+        learner.finish()
+        transitions += learner.transitions
+        wins += game.scores["Learner"] > game.scores["Opponent"]
+
+    return (*_stack(transitions), n_games, wins)
+
+
+# ----------------------------------------------------------------------------
+# Offline data: transitions of recorded games
+# ----------------------------------------------------------------------------
+
+def record_transitions(record, seats=(0, 1)):
+    """Yield the (obs, action, reward, next_obs, done) transitions of the given seats of a GameRecord."""
+    game = record.new_game()
+    pending = {}  # seat → (obs, action, margin before the decision)
+    for card in record.plays:
+        seat = game.to_move
+        player = game.players[seat]
+        if seat in seats:
+            obs = encode_observation(player)
+            margin = game.scores[player.name] - game.scores[game.players[1 - seat].name]
+            if seat in pending:
+                last_obs, action, last_margin = pending[seat]
+                yield last_obs, action, (margin - last_margin) / 120, obs, False
+            action = next(i for i, c in enumerate(player.hand) if c.id == card)
+            pending[seat] = (obs, action, margin)
+        game.apply_move(card)
+    terminal = np.zeros(OBS_SIZE, dtype=np.float32)
+    for seat, (obs, action, last_margin) in sorted(pending.items()):
+        player = game.players[seat]
+        margin = game.scores[player.name] - game.scores[game.players[1 - seat].name]
+        yield obs, action, (margin - last_margin) / 120, terminal, True
+
+
+def record_batches(path, batch_size=4096, indices=None, seats=(0, 1)):
+    """
+    Stream the transitions of a game record file as ReplayBuffer.add() arrays,
+    batch_size transitions at a time; indices selects (and orders) the games.
+    """
+    with GameRecordReader(path) as reader:
+        buf = []
+        for i in range(len(reader)) if indices is None else indices:
+            buf.extend(record_transitions(reader[i], seats))
+            while len(buf) >= batch_size:
+                yield _stack(buf[:batch_size])
+                del buf[:batch_size]
+        if buf:
+            yield _stack(buf)
+
+
+def _stack(transitions):
+    if not transitions:
+        return (np.zeros((0, OBS_SIZE), dtype=np.float32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32),
+                np.zeros((0, OBS_SIZE), dtype=np.float32), np.zeros(0, dtype=np.float32))
+    obs, actions, rewards, next_obs, done = zip(*transitions)
+    return (np.stack(obs), np.array(actions, dtype=np.int64), np.array(rewards, dtype=np.float32),
+            np.stack(next_obs), np.array(done, dtype=np.float32))
+
+
+# ----------------------------------------------------------------------------
+# Learner
+# ----------------------------------------------------------------------------
+
+class ReplayBuffer:
+    def __init__(self, capacity=500_000):
+        self.capacity = capacity
+        self.obs = np.zeros((capacity, OBS_SIZE), dtype=np.float32)
+        self.next_obs = np.zeros((capacity, OBS_SIZE), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.done = np.zeros(capacity, dtype=np.float32)
+        self.pos = 0
+        self.size = 0
+
+    def add(self, obs, actions, rewards, next_obs, done):
+        idx = (self.pos + np.arange(len(actions))) % self.capacity
+        self.obs[idx] = obs
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_obs[idx] = next_obs
+        self.done[idx] = done
+        self.pos = (self.pos + len(actions)) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size, rng):
+        idx = rng.integers(0, self.size, size=batch_size)
+        return (torch.from_numpy(self.obs[idx]), torch.from_numpy(self.actions[idx]),
+                torch.from_numpy(self.rewards[idx]), torch.from_numpy(self.next_obs[idx]),
+                torch.from_numpy(self.done[idx]))
+
+    def __len__(self):
+        return self.size
+
+
+def dqn_loss(net, target_net, batch, gamma):
+    obs, actions, rewards, next_obs, done = batch
+    q = net(obs).gather(1, actions.unsqueeze(1)).squeeze(1)
+    with torch.no_grad():
+        # Double DQN: the online net picks the next action among the valid slots, the target net scores it
+        mask = action_mask(next_obs)
+        next_q = net(next_obs).masked_fill(~mask, float("-inf"))
+        best = next_q.argmax(dim=1, keepdim=True)
+        target_q = target_net(next_obs).gather(1, best).squeeze(1)
+        target = rewards + gamma * (1 - done) * torch.where(mask.any(dim=1), target_q, torch.zeros_like(target_q))
+    return F.smooth_l1_loss(q, target)
+
+
+def _cpu_weights(net):
+    return {k: v.detach().clone() for k, v in net.state_dict().items()}
+
+
+def train_self_play(iterations=200, workers=None, games_per_task=64, tasks_per_iter=None,
+                    batch_size=4096, updates_per_iter=8, lr=1e-3, gamma=0.99,
+                    epsilon_start=0.5, epsilon_end=0.05, target_sync=50, snapshot_every=20,
+                    pool_size=10, seed=0, threads=None, out_path=MODEL_PATH,
+                    checkpoint_dir="ai/models/rl_checkpoints", records=None, log=print):
+    """
+    Train an RLAgent by self-play and save its weights to out_path.
+
+    Each iteration hands tasks_per_iter rollout tasks (games_per_task games
+    each) to the worker pool and, while they run, performs updates_per_iter
+    learner updates on the data of the previous iteration. Every
+    snapshot_every iterations the current weights join the opponent pool.
+    records: a game record file (game/records.py) whose transitions pre-fill
+    the replay buffer.
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    torch.manual_seed(seed)
+    np_rng = np.random.default_rng(seed)
+    workers = workers or os.cpu_count()
+    tasks_per_iter = tasks_per_iter or workers
+
+    net = QNetwork(OBS_SIZE, NUM_ACTIONS)
+    target_net = QNetwork(OBS_SIZE, NUM_ACTIONS)
+    target_net.load_state_dict(net.state_dict())
+    optimizer = torch.optim.Adam(net.parameters(), lr=lr)
+    buffer = ReplayBuffer()
+    if records:
+        for batch in record_batches(records):
+            buffer.add(*batch)
+        log(f"Replay buffer pre-filled with {len(buffer):,} transitions from {records}")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    opponents = [("rule", None)]  # (checkpoint id, weight file or None for RuleBasedPlayer)
+    shared = {k: v.clone().share_memory_() for k, v in _cpu_weights(net).items()}
+    updates = 0
+    env_steps = 0
+    learner_time = 0.0
+    start = time.perf_counter()
+
+    def submit(it):
+        eps = epsilon_start + (epsilon_end - epsilon_start) * min(1.0, it / max(1, iterations - 1))
+        # No task of the previous round is running: the workers see the new weights from their next game
+        with torch.no_grad():
+            for k, v in net.state_dict().items():
+                shared[k].copy_(v)
+        tasks = [(opponents[-pool_size:], games_per_task, eps, seed * 1_000_003 + it * 1009 + t)
+                 for t in range(tasks_per_iter)]
+        return pool.map_async(rollout, tasks)
+
+    with Pool(workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        pending = submit(0)
+        for it in range(iterations):
+            results = pending.get()
+            if it + 1 < iterations:
+                pending = submit(it + 1)  # workers play the next games while we learn
+
+            games = wins = 0
+            for obs, actions, rewards, next_obs, done, n_games, n_wins in results:
+                buffer.add(obs, actions, rewards, next_obs, done)
+                env_steps += len(actions)
+                games += n_games
+                wins += n_wins
+
+            t0 = time.perf_counter()
+            loss_sum = 0.0
+            if len(buffer) >= batch_size:
+                for _ in range(updates_per_iter):
+                    loss = dqn_loss(net, target_net, buffer.sample(batch_size, np_rng), gamma)
+                    optimizer.zero_grad()
+                    loss.backward()
+                    optimizer.step()
+                    loss_sum += loss.item()
+                    updates += 1
+                    if updates % target_sync == 0:
+                        target_net.load_state_dict(net.state_dict())
+            learner_time += time.perf_counter() - t0
+
+            if (it + 1) % snapshot_every == 0:
+                key = f"iter_{it + 1:05d}"
+                path = os.path.join(checkpoint_dir, f"{key}.pt")
+                torch.save(_cpu_weights(net), path)
+                opponents.append((key, path))
+
+            elapsed = time.perf_counter() - start
+            log(f"Iter {it + 1} | win rate {wins / max(games, 1):.2%} | "
+                f"loss {loss_sum / max(1, updates_per_iter):.4f} | "
+                f"{env_steps / elapsed:,.0f} steps/s | learner utilization {learner_time / elapsed:.0%}")
+
+    torch.save(net.state_dict(), out_path)
+    return net
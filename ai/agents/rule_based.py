@@ -2,7 +2,10 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+import numpy as np
 from game.player import Player
+from game.cards import CARD_POINTS_BY_ID
+from game.batch import POINTS_TABLE, EMPTY
 
 class RuleBasedPlayer(Player):
     def play_card(self):
@@ -10,7 +13,12 @@ class RuleBasedPlayer(Player):
             return None
         self.original_hand = self.hand.copy()
         # Simple strategy: play lowest point card
-        lowest = min(self.hand, key=lambda c: c.points())
+        lowest = min(self.hand, key=lambda c: CARD_POINTS_BY_ID[c.id])
         self.hand.remove(lowest)
         return lowest
 
+    @staticmethod
+    def batch_actions(hands: np.ndarray) -> np.ndarray:
+        """Same strategy over (N, 3) EMPTY-padded hands from BatchBriscola."""
+        points = np.where(hands == EMPTY, np.iinfo(np.int16).max, POINTS_TABLE[hands])
+        return np.argmin(points, axis=1)
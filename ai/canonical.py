@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from game import instrument
+from ai.observation import STATE_FEATURES, HISTORY_LEN
+
+"""
+Canonical form of history observations under the symmetries of Briscola.
+
+Permuting the three non-trump suits, or reordering the cards of a hand,
+gives an equivalent position. canonicalize() maps every observation of
+ai/observation.py (K states of v1, s1, v2, s2, v3, s3, briscola, opp_v,
+opp_s) to one representative of its class:
+
+  - the trump suit becomes suit 0;
+  - each non-trump suit gets a signature, the sorted list of (state, is the
+    opponent's card, value) of its cards in the observation. The suits are
+    relabelled 1, 2, 3 in signature order. The signature does not depend on
+    the labels or on the hand order, and two suits with equal signatures
+    can be swapped without changing the result;
+  - every hand is sorted by (value, suit) descending, so empty slots stay last.
+
+The canonical observation is returned with `order`: order[j] is the slot of
+the current (last) hand that canonical slot j came from, so an action chosen
+on the canonical observation maps back with hand.pop(order[j]).
+"""
+
+_HAND_SLOTS = (0, 2, 4)
+_OPP = 7
+_BRISCOLA = 6
+
+
+@instrument.section("encode.canonicalize")
+def canonicalize(obs, history_len=HISTORY_LEN):
+    """Returns (canonical observation as a tuple of ints, order)."""
+    obs = np.asarray(obs, dtype=np.int64).tolist()
+    trump = obs[_BRISCOLA]
+    signatures = {s: [] for s in range(4) if s != trump}
+    for state in range(history_len):
+        base = state * STATE_FEATURES
+        for slot in _HAND_SLOTS + (_OPP,):
+            value = obs[base + slot]
+            suit = obs[base + slot + 1]
+            if value and suit != trump:
+                signatures[suit].append((state, slot == _OPP, value))
+    for sig in signatures.values():
+        sig.sort()
+    label = {trump: 0}
+    for i, suit in enumerate(sorted(signatures, key=signatures.get)):
+        label[suit] = i + 1
+
+    out = []
+    order = None
+    for state in range(history_len):
+        base = state * STATE_FEATURES
+        hand = sorted(((obs[base + j], label[obs[base + j + 1]], j // 2) for j in _HAND_SLOTS if obs[base + j]),
+                      reverse=True)
+        for value, suit, _ in hand:
+            out += (value, suit)
+        out += (0, 0) * (3 - len(hand))
+        out.append(0)
+        opp_value = obs[base + _OPP]
+        out += (opp_value, label[obs[base + _OPP + 1]]) if opp_value else (0, 0)
+        order = [slot for _, _, slot in hand]
+    return tuple(out), order
+
+
+def _lowest_equivalent_slot(canonical, slot, history_len):
+    """
+    Two suits with equal signatures are interchangeable, so the same card
+    value in either of them is the same decision: return the lowest slot of
+    the current hand equivalent to `slot`.
+    """
+    last = (history_len - 1) * STATE_FEATURES
+    value, suit = canonical[last + 2 * slot], canonical[last + 2 * slot + 1]
+    for j in range(slot):
+        other = canonical[last + 2 * j + 1]
+        if canonical[last + 2 * j] != value or other == suit or 0 in (other, suit):
+            continue
+        swap = {suit: other, other: suit}
+        swapped = list(canonical)
+        for state in range(history_len):
+            base = state * STATE_FEATURES
+            for col in (1, 3, 5, 8):
+                swapped[base + col] = swap.get(swapped[base + col], swapped[base + col]) if swapped[base + col - 1] else 0
+        if canonicalize(swapped, history_len)[0] == canonical:
+            return j
+    return slot
+
+
+def canonicalize_rows(rows: np.ndarray, history_len=HISTORY_LEN) -> np.ndarray:
+    """
+    Canonicalize dataset rows (K * 9 features followed by the action index);
+    the action is mapped to its canonical slot (the lowest of equivalent ones).
+    """
+    n_features = history_len * STATE_FEATURES
+    out = np.empty_like(rows)
+    for i, row in enumerate(rows):
+        canonical, order = canonicalize(row[:n_features], history_len)
+        out[i, :n_features] = canonical
+        action = int(row[n_features])
+        if action in order:
+            action = _lowest_equivalent_slot(canonical, order.index(action), history_len)
+        out[i, n_features] = action
+    return out
+
+
+def augment_rows(rows: np.ndarray, rng, history_len=HISTORY_LEN) -> np.ndarray:
+    """
+    A random symmetric variant of every row: one random relabelling of the
+    four suits (trump included) and a random order of the cards of each
+    hand, with the action following its card. Returns a new array.
+    """
+    n = len(rows)
+    out = rows.copy()
+    states = out[:, :history_len * STATE_FEATURES].reshape(n, history_len, STATE_FEATURES)
+    r = np.arange(n)[:, None]
+
+    perm = rng.permuted(np.tile(np.arange(4), (n, 1)), axis=1)
+    for col in (1, 3, 5, 8):  # suits of the hand cards and of the opponent's card; 0 for empty slots
+        states[:, :, col] = np.where(states[:, :, col - 1] > 0, perm[r, states[:, :, col]], 0)
+    states[:, :, _BRISCOLA] = perm[r, states[:, :, _BRISCOLA]]
+
+    # Shuffle the non-empty slots of each hand, keeping empty slots last
+    empty = states[:, :, 0:6:2] == 0
+    order = np.argsort(rng.random(empty.shape) + 2 * empty, axis=2)
+    cards = states[:, :, :6].reshape(n, history_len, 3, 2)
+    states[:, :, :6] = np.take_along_axis(cards, order[..., None], axis=2).reshape(n, history_len, 6)
+
+    action = rows[:, -1].astype(np.int64)
+    out[:, -1] = np.argmax(order[:, -1, :] == action[:, None], axis=1)
+    return out
@@ -0,0 +1,199 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import queue
+import threading
+import numpy as np
+import torch
+from ai.canonical import augment_rows
+
+"""
+Memory-mapped training data.
+
+ShardDataset opens the int8 .npy shards written by
+scripts/generate_dataset.py::generate_dataset_shards without reading them,
+so startup cost does not depend on the dataset size and datasets larger than
+RAM can be trained on.
+
+ShardLoader yields (features, actions) int8 tensors built with
+torch.from_numpy, i.e. views over the shard (no shuffle) or over the
+currently shuffled block. Shuffling is done per block: the block order is
+permuted, then rows within each block, so reads stay sequential on disk.
+A background thread prepares the next batches while the model trains.
+
+Deduplicated datasets (scripts/dedup_dataset.py) store one canonical row per
+class of equivalent rows plus a weights .npy per shard with the number of
+rows it stands for; their batches are (features, actions, weights). With
+augment=True every row is replaced by a random symmetric variant each time
+it is served (ai/canonical.py::augment_rows), which a model trained on
+canonical rows needs to see raw observations again.
+
+For data-parallel training (rank, world_size) every process gets its own
+contiguous 1/world_size of the rows of the same shuffled epoch and only
+reads those rows (see _blocks). The last len(dataset) % world_size rows of
+the epoch order (fewer than world_size, different ones every epoch) are
+left out, so that every rank takes the same number of steps.
+"""
+
+MANIFEST = "manifest.json"
+
+
+class ShardDataset:
+    def __init__(self, shard_dir="data/shards"):
+        with open(os.path.join(shard_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.columns = self.manifest["columns"]
+        # mmap_mode="c": copy-on-write pages, so torch.from_numpy gets a writable view
+        self.shards = [
+            np.load(os.path.join(shard_dir, s["file"]), mmap_mode="c")
+            for s in self.manifest["shards"]
+        ]
+        self.weights = None  # per shard row counts of a deduplicated dataset
+        if all("weights" in s for s in self.manifest["shards"]):
+            self.weights = [np.load(os.path.join(shard_dir, s["weights"]), mmap_mode="c")
+                            for s in self.manifest["shards"]]
+
+    @property
+    def canonical(self) -> bool:
+        return bool(self.manifest.get("canonical", False))
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns) - 1
+
+    def __len__(self):
+        return sum(len(s) for s in self.shards)
+
+
+class ShardLoader:
+    def __init__(self, dataset, batch_size=4096, shuffle=True, block_size=1 << 16,
+                 seed=0, prefetch=4, drop_last=False, augment=False, rank=0, world_size=1):
+        self.dataset = dataset
+        self.rank = rank
+        self.world_size = world_size
+        self.augment = augment
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.block_size = block_size
+        self.seed = seed
+        self.prefetch = prefetch
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        """Use a different (but reproducible) shuffle for each epoch."""
+        self.epoch = epoch
+
+    def _rank_rows(self):
+        """Rows of the epoch order read by this rank: [first, last)."""
+        n = len(self.dataset)
+        if self.world_size == 1:
+            return 0, n
+        share = n // self.world_size
+        return self.rank * share, (self.rank + 1) * share
+
+    def __len__(self):
+        """Batches yielded to this rank per epoch (the same on every rank)."""
+        first, last = self._rank_rows()
+        n = last - first
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+    def _blocks(self):
+        """(rows, weights or None) blocks of this rank's rows, shuffled for the current epoch."""
+        weights = self.dataset.weights or [None] * len(self.dataset.shards)
+        blocks = [
+            (shard, w, start, min(start + self.block_size, len(shard)))
+            for shard, w in zip(self.dataset.shards, weights)
+            for start in range(0, len(shard), self.block_size)
+        ]
+        order = range(len(blocks))
+        if self.shuffle:
+            order = np.random.default_rng((self.seed, self.epoch)).permutation(len(blocks))
+        # Every rank knows the whole epoch order without reading it, and only reads its own rows
+        first, last = self._rank_rows()
+        pos = 0
+        for i in order:
+            shard, w, start, end = blocks[i]
+            a, b = max(first - pos, 0), min(last - pos, end - start)
+            pos += end - start
+            if a < b:
+                if self.shuffle:
+                    # One generator per block, so a rank can shuffle a block without the ones before it
+                    perm = np.random.default_rng((self.seed, self.epoch, 2, int(i))).permutation(end - start)
+                    rows = start + perm[a:b]
+                else:
+                    rows = slice(start + a, start + b)
+                yield shard[rows], None if w is None else w[rows]
+            if pos >= last:
+                return
+
+    def _batches(self):
+        carry = None
+        for block in self._blocks():
+            if carry is not None:
+                block = tuple(None if c is None else np.concatenate([c, b]) for c, b in zip(carry, block))
+                carry = None
+            rows, weights = block
+            n_full = len(rows) // self.batch_size * self.batch_size
+            for start in range(0, n_full, self.batch_size):
+                end = start + self.batch_size
+                yield rows[start:end], None if weights is None else weights[start:end]
+            if n_full < len(rows):
+                carry = rows[n_full:], None if weights is None else weights[n_full:]
+        if carry is not None and not self.drop_last:
+            yield carry
+
+    def _split(self, batch, rng=None):
+        rows, weights = batch
+        if rng is not None:
+            rows = augment_rows(rows, rng)
+        t = torch.from_numpy(rows)
+        if weights is None:
+            return t[:, :-1], t[:, -1]
+        return t[:, :-1], t[:, -1], torch.from_numpy(weights)
+
+    def __iter__(self):
+        aug_seed = (self.seed, self.epoch, 1) if self.world_size == 1 else (self.seed, self.epoch, 1, self.rank)
+        rng = np.random.default_rng(aug_seed) if self.augment else None
+        if self.prefetch <= 0:
+            for batch in self._batches():
+                yield self._split(batch, rng)
+            return
+
+        q = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for batch in self._batches():
+                    if not put(self._split(batch, rng)):
+                        return
+            except Exception as e:
+                put(e)
+            put(done)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import torch
+
+"""
+Batched inference broker.
+
+Many games ask for decisions concurrently; the broker queues their states and
+a single background thread runs the model on them as one batch, as soon as
+max_batch_size states are pending or the oldest one has waited max_wait
+seconds. States of different widths are never padded to a common one (zeros
+change the output of the conv stack and its global max-pool): each width
+gets its own model call. Results are sent back through futures.
+
+The broker is callable like the model itself, so it can be passed as
+ModelPlayer(model=broker): each play_card() call then blocks its own thread
+until its batch has been evaluated.
+"""
+
+_STOP = object()
+
+
+class InferenceBroker:
+    def __init__(self, model, max_batch_size=256, max_wait=0.002):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._serve, name="InferenceBroker", daemon=True)
+        self._thread.start()
+
+    def submit(self, state) -> Future:
+        """Queue one 1-D state; the future resolves to the model's output row."""
+        future = Future()
+        self._queue.put((torch.as_tensor(state, dtype=torch.float32), future))
+        return future
+
+    async def infer(self, state):
+        """asyncio front end: await the output row for one state."""
+        return await asyncio.wrap_future(self.submit(state))
+
+    def __call__(self, x):
+        """Drop-in for model(x) with x of shape (batch, features)."""
+        futures = [self.submit(row) for row in x]
+        return torch.stack([f.result() for f in futures])
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or max_wait passes."""
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next loop
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            groups = {}  # width → requests, so a result never depends on what it was batched with
+            for state, future in batch:
+                groups.setdefault(state.shape[0], []).append((state, future))
+            for group in groups.values():
+                try:
+                    with torch.no_grad():
+                        out = self.model(torch.stack([state for state, _ in group]))
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+                self.batches += 1
+                self.requests += len(group)
+                for i, (_, future) in enumerate(group):
+                    future.set_result(out[i])
+
+
+def run_games_threaded(play_one, n_games, threads=64):
+    """
+    Thread-pool front end: run play_one(game_index) for n_games on `threads`
+    threads, so games whose players share a broker get their decisions batched.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(play_one, range(n_games)))
@@ -1,23 +1,41 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from game import instrument
 
 class CNNBriscolaModel(nn.Module):
-    def __init__(self, input_len=27, num_actions=3):
+    def __init__(self, input_len=27, num_actions=3, channels=(16, 32), kernel_size=3):
         super(CNNBriscolaModel, self).__init__()
-        self.conv1 = nn.Conv1d(in_channels=1, out_channels=16, kernel_size=3, padding=1)
-        self.conv2 = nn.Conv1d(in_channels=16, out_channels=32, kernel_size=3, padding=1)
+        c1, c2 = channels
+        # odd kernel sizes with "same" padding keep the length (NumpyCNNBriscolaModel relies on it)
+        self.conv1 = nn.Conv1d(in_channels=1, out_channels=c1, kernel_size=kernel_size, padding=kernel_size // 2)
+        self.conv2 = nn.Conv1d(in_channels=c1, out_channels=c2, kernel_size=kernel_size, padding=kernel_size // 2)
         self.pool = nn.AdaptiveMaxPool1d(1)  # Reduce temporal dimension to 1
-        self.fc = nn.Linear(32, num_actions)
+        self.fc = nn.Linear(c2, num_actions)
 
+    @instrument.section("model.CNNBriscolaModel.forward")
     def forward(self, x):
         # x shape: (batch, 27)
         x = x.unsqueeze(1)  # (batch, 1, 27)
-        x = F.relu(self.conv1(x))  # (batch, 16, 27)
-        x = F.relu(self.conv2(x))  # (batch, 32, 27)
-        x = self.pool(x)           # (batch, 32, 1)
-        x = x.squeeze(2)           # (batch, 32)
+        x = F.relu(self.conv1(x))  # (batch, c1, 27)
+        x = F.relu(self.conv2(x))  # (batch, c2, 27)
+        x = self.pool(x)           # (batch, c2, 1)
+        x = x.squeeze(2)           # (batch, c2)
         x = self.fc(x)             # (batch, num_actions)
         return x
 
 
+class QNetwork(nn.Module):
+    """Action-value network used by the self-play RL agent (ai/agents/rl_agent.py)."""
+    def __init__(self, input_len=27, num_actions=3, hidden=128):
+        super(QNetwork, self).__init__()
+        self.fc1 = nn.Linear(input_len, hidden)
+        self.fc2 = nn.Linear(hidden, hidden)
+        self.out = nn.Linear(hidden, num_actions)
+
+    @instrument.section("model.QNetwork.forward")
+    def forward(self, x):
+        # x shape: (batch, input_len)
+        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc2(x))
+        return self.out(x)         # (batch, num_actions)
@@ -0,0 +1,100 @@
+import numpy as np
+from game import instrument
+
+"""
+Pure NumPy inference for CNNBriscolaModel.
+
+The network is two Conv1d layers (kernel 3, padding 1), a global max-pool and
+a Linear layer. For a fixed input length a convolution is a linear map, so
+each Conv1d is unrolled once into a dense (L * C_in, L * C_out) matrix and
+the forward pass is three matrix products: no padding, im2col or per-call
+reshaping of the weights, which is what dominates single-state calls.
+Loading the weights from the .npz written by scripts/export_model.py needs
+no torch import, which keeps lightweight players and evaluation workers fast
+to start.
+
+Weights exported with --quantize are stored as int8 with one float32 scale
+per output channel and are dequantized once at load time.
+"""
+
+
+def unroll_conv1d(weight, length):
+    """
+    Dense matrix of a zero-padded "same" Conv1d, weight (C_out, C_in, K) with K
+    odd: x.reshape(B, L * C_in) @ matrix == conv(x) as (B, L * C_out), both
+    position-major.
+    """
+    c_out, c_in, k = weight.shape
+    dense = np.zeros((length, c_in, length, c_out), dtype=np.float32)
+    for tap in range(k):
+        shift = tap - k // 2
+        for j in range(max(0, -shift), min(length, length - shift)):
+            dense[j + shift, :, j, :] = weight[:, :, tap].T
+    return dense.reshape(length * c_in, length * c_out)
+
+
+class NumpyCNNBriscolaModel:
+    accepts_numpy = True  # ModelPlayer passes NumPy observations straight through
+
+    def __init__(self, params):
+        self.params = {k: np.asarray(v, dtype=np.float32) for k, v in params.items()}
+        self.fc_weight = np.ascontiguousarray(self.params["fc.weight"].T)
+        self._unrolled = {}  # input length → (conv1 matrix, conv1 bias, conv2 matrix, conv2 bias)
+
+    def _layers(self, length):
+        layers = self._unrolled.get(length)
+        if layers is None:
+            p = self.params
+            layers = self._unrolled[length] = (
+                unroll_conv1d(p["conv1.weight"], length), np.tile(p["conv1.bias"], length),
+                unroll_conv1d(p["conv2.weight"], length), np.tile(p["conv2.bias"], length))
+        return layers
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        params = {}
+        for name in data.files:
+            if name.endswith(".scale"):
+                continue
+            if name + ".scale" in data.files:
+                # int8 weights with a per-output-channel scale
+                scale = data[name + ".scale"].reshape((-1,) + (1,) * (data[name].ndim - 1))
+                params[name] = data[name].astype(np.float32) * scale
+            else:
+                params[name] = data[name]
+        return cls(params)
+
+    def __call__(self, x):
+        return self.forward(x)
+
+    @instrument.section("model.NumpyCNNBriscolaModel.forward")
+    def forward(self, x):
+        # x shape: (batch, L)
+        x = np.asarray(x, dtype=np.float32)
+        batch, length = x.shape
+        w1, b1, w2, b2 = self._layers(length)
+        h = x @ w1                               # (batch, L * 16)
+        h += b1
+        np.maximum(h, 0, out=h)
+        h = h @ w2                               # (batch, L * 32)
+        h += b2
+        np.maximum(h, 0, out=h)
+        h = h.reshape(batch, length, -1).max(axis=1)  # (batch, 32)
+        return h @ self.fc_weight + self.params["fc.bias"]  # (batch, num_actions)
+
+
+def quantize_params(params):
+    """Symmetric per-output-channel int8 quantization of the weight matrices (biases stay float32)."""
+    out = {}
+    for name, value in params.items():
+        value = np.asarray(value, dtype=np.float32)
+        if name.endswith(".weight"):
+            flat = np.abs(value.reshape(value.shape[0], -1)).max(axis=1)
+            scale = np.where(flat > 0, flat / 127.0, 1.0).astype(np.float32)
+            shaped = scale.reshape((-1,) + (1,) * (value.ndim - 1))
+            out[name] = np.clip(np.round(value / shaped), -127, 127).astype(np.int8)
+            out[name + ".scale"] = scale
+        else:
+            out[name] = value
+    return out
@@ -0,0 +1,162 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from game.cards import CARD_VALUE, CARD_SUIT, CARD_POINTS_BY_ID, TRICK_WINNER
+from game import instrument
+
+"""
+Observation encoders shared by the agents, the dataset generator and training.
+
+History observation (ModelPlayer / CNNBriscolaModel, data/dataset.csv):
+each state has STATE_FEATURES = 9 values
+
+    v1, s1, v2, s2, v3, s3   value and suit index of the cards in hand (0, 0 if empty)
+    briscola                 suit index of the trump
+    opp_v, opp_s             last card played by the opponent (0, 0 if none)
+
+and the observation is the last K states, oldest first (K * 9 values).
+
+ObservationBuffer keeps those K states in a preallocated ring written twice
+(at i and i + K), so the last K states are always one contiguous slice:
+view() returns it without building any list or copying. The first state
+pushed after reset() fills the whole history. BatchObservationBuffer does the
+same for the N games of a BatchBriscola.
+
+encode_game_features() is the single-step 27-feature encoding used by the RL
+agent (ai/agents/rl_agent.py).
+"""
+
+STATE_FEATURES = 9
+HISTORY_LEN = 3
+
+# CARD_CODE[card_id + 1] = (value, suit index); row 0 encodes "no card"
+CARD_CODE = np.zeros((len(CARD_VALUE) + 1, 2), dtype=np.int8)
+CARD_CODE[1:, 0] = CARD_VALUE
+CARD_CODE[1:, 1] = CARD_SUIT
+
+
+class ObservationBuffer:
+    def __init__(self, history_len=HISTORY_LEN, dtype=np.float32):
+        self.k = history_len
+        self.buf = np.zeros((2 * history_len, STATE_FEATURES), dtype=dtype)
+        self.reset()
+
+    def reset(self):
+        self.pos = 0
+        self.pushes = 0
+
+    @instrument.section("encode.history_push")
+    def push(self, hand, trump: int, opp_card=None):
+        """Append the state for a hand of Cards, the trump suit index and the opponent's last Card."""
+        k = self.k
+        row = self.buf[self.pos]
+        row[:] = 0
+        for i, card in enumerate(hand):
+            row[2 * i] = CARD_VALUE[card.id]
+            row[2 * i + 1] = CARD_SUIT[card.id]
+        row[6] = trump
+        if opp_card is not None:
+            row[7] = CARD_VALUE[opp_card.id]
+            row[8] = CARD_SUIT[opp_card.id]
+
+        if self.pushes == 0:
+            self.buf[:] = row  # pad the history with the first state
+        else:
+            self.buf[self.pos + k] = row
+        self.pushes += 1
+        self.pos = (self.pos + 1) % k
+        return self.view()
+
+    def view(self) -> np.ndarray:
+        """The last K states, oldest first, as a flat contiguous view (K * 9,)."""
+        return self.buf[self.pos:self.pos + self.k].reshape(-1)
+
+
+class BatchObservationBuffer:
+    """ObservationBuffer for N games advanced in lockstep (one buffer per game and seat)."""
+    def __init__(self, n_games, history_len=HISTORY_LEN, dtype=np.float32):
+        self.k = history_len
+        self.buf = np.zeros((n_games, 2, 2 * history_len, STATE_FEATURES), dtype=dtype)
+        self.pos = np.zeros((n_games, 2), dtype=np.int64)
+        self.pushes = np.zeros((n_games, 2), dtype=np.int64)
+        self._rows = np.arange(n_games)
+
+    @instrument.section("encode.batch_push")
+    def push(self, seats, hands, trump, opp_cards):
+        """
+        seats (N,), hands (N, 3) card ids padded with -1, trump (N,) suit index,
+        opp_cards (N,) card ids or -1. Returns the (N, K * 9) observations of `seats`.
+        """
+        k = self.k
+        rows = np.empty((len(seats), STATE_FEATURES), dtype=self.buf.dtype)
+        rows[:, :6] = CARD_CODE[np.asarray(hands) + 1].reshape(len(seats), 6)
+        rows[:, 6] = trump
+        rows[:, 7:] = CARD_CODE[np.asarray(opp_cards) + 1]
+
+        r = self._rows
+        pos = self.pos[r, seats]
+        first = self.pushes[r, seats] == 0
+        if first.any():
+            self.buf[r[first], seats[first]] = rows[first, None, :]
+        self.buf[r, seats, pos] = rows
+        self.buf[r, seats, pos + k] = rows
+        self.pushes[r, seats] += 1
+        self.pos[r, seats] = (pos + 1) % k
+        return self.view(seats)
+
+    def view(self, seats) -> np.ndarray:
+        """(N, K * 9) observations of `seats` (gathered, one row per game)."""
+        idx = self.pos[self._rows, seats, None] + np.arange(self.k)
+        return self.buf[self._rows[:, None], seats[:, None], idx].reshape(len(seats), -1)
+
+
+def observe(player, buffer: ObservationBuffer) -> np.ndarray:
+    """Push the current state of `player` in its BriscolaGame and return its history view."""
+    game = player.game
+    return buffer.push(player.hand, game.briscola_index, game.last_played[1 - player.seat])
+
+
+def observe_batch(engine, buffer: BatchObservationBuffer) -> np.ndarray:
+    """Same as observe() for the players to move in every game of a BatchBriscola."""
+    seats = engine.to_move
+    return buffer.push(seats, engine.current_hands(), engine.briscola_suit,
+                       engine.last_played[engine._rows, 1 - seats])
+
+
+GAME_FEATURES = 27
+
+
+@instrument.section("encode.game_features")
+def encode_game_features(player, out=None) -> np.ndarray:
+    """
+    Single-step observation of `player` (27 float32 values): per hand slot
+    (value, points, is briscola, present, beats the card led), the card led,
+    the trump suit one-hot, both scores, deck size and trumps already played.
+    """
+    game = player.game
+    trump = game.briscola_index
+    obs = np.zeros(GAME_FEATURES, dtype=np.float32) if out is None else out
+    if out is not None:
+        obs[:] = 0
+    lead = game.table[0].id if game.table else None
+
+    # Hand: 3 slots × (value, points, is briscola, present, beats the card led)
+    for i, card in enumerate(player.hand):
+        cid = card.id
+        obs[5 * i:5 * i + 4] = (CARD_VALUE[cid] / 10, CARD_POINTS_BY_ID[cid] / 11, CARD_SUIT[cid] == trump, 1)
+        if lead is not None:
+            obs[5 * i + 4] = TRICK_WINNER[lead][cid][trump]
+
+    # Card led by the opponent (value, points, is briscola, present)
+    if lead is not None:
+        obs[15:19] = (CARD_VALUE[lead] / 10, CARD_POINTS_BY_ID[lead] / 11, CARD_SUIT[lead] == trump, 1)
+
+    obs[19 + trump] = 1
+    opponent = game.players[1 - player.seat]
+    obs[23] = game.scores[player.name] / 120
+    obs[24] = game.scores[opponent.name] / 120
+    obs[25] = len(game.deck) / 34
+    obs[26] = sum(1 for c in game.played_cards if CARD_SUIT[c.id] == trump) / 10
+    return obs
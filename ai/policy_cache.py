@@ -0,0 +1,182 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import itertools
+from collections import OrderedDict
+import numpy as np
+from game.cards import CARDS, N_CARDS
+from ai.observation import ObservationBuffer, STATE_FEATURES, HISTORY_LEN
+from ai.canonical import canonicalize
+
+"""
+Bounded LRU cache of model outputs keyed by canonical observation.
+
+ModelPlayer(model, cache=PolicyCache(path=...)) canonicalizes its first
+`depth` observations of a game (ai/canonical.py) and looks them up here; on
+a miss it runs the model on the raw observation, exactly as without a cache.
+An entry is shared by a whole class of equivalent positions, so it may only
+hold a decision the model takes for every member of the class: a network
+trained on raw observations is not invariant under the symmetries, and an
+output computed on one member (or on the canonical form, which it never saw
+in training) often picks a different card for another.
+
+build_opening_book() therefore evaluates, for every first decision of a game
+(about 75k canonical positions), all its raw variants: the 24 relabellings
+of the suits (trump included) times the 6 orders of the hand. A class is
+stored, its output in canonical slot order, only when every variant plays
+the same canonical card and no two of its suits are interchangeable (their
+cards could not be told apart by the slot). The others stay out of the
+cache and are always evaluated, so a hit plays the uncached move by
+construction (scripts/verify_policy_cache.py checks it on games). Only the
+first decision is worth a book: later observations carry three states of
+history and almost never repeat.
+
+save() / load() persist the entries as an .npz (keys as a (n, K * 9) int8
+array, outputs as float32, plus the book format); load() refuses files
+without it, written by earlier versions that stored unchecked outputs. A
+cache belongs to one model: do not share it between different weights.
+"""
+
+BOOK_VERSION = 2
+
+
+class PolicyCache:
+    def __init__(self, capacity=100_000, path=None, depth=1):
+        """depth: ModelPlayer consults the cache for its first `depth` decisions of a game (None = all)."""
+        self.capacity = capacity
+        self.depth = depth
+        self.entries = OrderedDict()  # canonical key (bytes) → model output row (np.ndarray)
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def get(self, key):
+        output = self.entries.get(key)
+        if output is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return output
+
+    def put(self, key, output):
+        self.entries[key] = output
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hit_rate}
+
+    def save(self, path):
+        """Write the entries, least recently used first, to an .npz file."""
+        keys = np.array([np.frombuffer(k, dtype=np.int8) for k in self.entries], dtype=np.int8)
+        outputs = np.array(list(self.entries.values()), dtype=np.float32)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, keys=keys, outputs=outputs, version=BOOK_VERSION)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        data = np.load(path)
+        if "version" not in data or int(data["version"]) != BOOK_VERSION:
+            raise ValueError(f"{path} is not a checked opening book: rebuild it with scripts/build_policy_cache.py")
+        for key, output in zip(data["keys"], data["outputs"]):
+            self.put(key.tobytes(), output)
+
+
+def opening_observations():
+    """
+    Canonical observations of every first decision of a game: the leader's
+    three-card hand, and the follower's hand with each possible card led
+    (trump suit 0; canonicalization covers the other trumps).
+    """
+    buf = ObservationBuffer()
+    seen = set()
+    out = []
+    for hand in itertools.combinations(range(N_CARDS), 3):
+        cards = [CARDS[i] for i in hand]
+        for lead in (None,) + tuple(i for i in range(N_CARDS) if i not in hand):
+            buf.reset()
+            obs = buf.push(cards, 0, None if lead is None else CARDS[lead])
+            key = bytes(canonicalize(obs)[0])
+            if key not in seen:
+                seen.add(key)
+                out.append(key)
+    return out
+
+
+_SUIT_PERMS = np.array(list(itertools.permutations(range(4))))  # relabellings of the 4 suits
+_HAND_ORDERS = np.array(list(itertools.permutations(range(3))))  # orders of a full hand
+
+
+def opening_variants(canonical):
+    """
+    Every raw variant of canonical opening observations (n, K * 9): returns
+    variants (n, 144, K * 9) and slots (144, 3), where slots[v, a] is the
+    canonical slot of hand slot a of variant v. Variant 0 is the canonical
+    observation itself.
+    """
+    n = len(canonical)
+    states = canonical.reshape(n, HISTORY_LEN, STATE_FEATURES)
+    variants = np.empty((n, len(_SUIT_PERMS) * len(_HAND_ORDERS), HISTORY_LEN, STATE_FEATURES), dtype=canonical.dtype)
+    slots = np.empty((variants.shape[1], 3), dtype=np.int64)
+    v = 0
+    for perm in _SUIT_PERMS:
+        relabelled = states.copy()
+        for col in (1, 3, 5, 8):  # suits of the hand cards and of the card led; 0 for empty slots
+            relabelled[:, :, col] = np.where(states[:, :, col - 1] > 0, perm[states[:, :, col]], 0)
+        relabelled[:, :, 6] = perm[states[:, :, 6]]
+        for order in _HAND_ORDERS:
+            variants[:, v] = relabelled
+            variants[:, v, :, :6] = relabelled[:, :, :6].reshape(n, HISTORY_LEN, 3, 2)[:, :, order].reshape(n, HISTORY_LEN, 6)
+            slots[v] = order
+            v += 1
+    return variants.reshape(n, v, -1), slots
+
+
+def _interchangeable_suits(canonical):
+    """True if two non-trump suits of an opening position hold the same cards (same values, in hand or led)."""
+    last = (HISTORY_LEN - 1) * STATE_FEATURES
+    signatures = {}
+    for slot in (0, 2, 4, 7):
+        value, suit = canonical[last + slot], canonical[last + slot + 1]
+        if value and suit:
+            signatures.setdefault(suit, []).append((slot == 7, value))
+    sigs = [tuple(sorted(sig)) for sig in signatures.values()]
+    return len(set(sigs)) < len(sigs)
+
+
+def build_opening_book(evaluate, cache=None, keys=None, batch_size=256):
+    """
+    Fill a cache with the outputs of evaluate(batch of raw observations) for
+    the opening positions on which the model plays the same card in every
+    variant; returns the cache. keys: opening_observations(), if already computed.
+    """
+    keys = keys or opening_observations()
+    if cache is None:
+        cache = PolicyCache(capacity=2 * len(keys))
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        canonical = np.array([np.frombuffer(k, dtype=np.int8) for k in chunk], dtype=np.int64)
+        variants, slots = opening_variants(canonical)
+        outputs = np.asarray(evaluate(variants.reshape(-1, variants.shape[2]).astype(np.float32)), dtype=np.float32)
+        outputs = outputs.reshape(len(chunk), variants.shape[1], -1)
+        actions = outputs.argmax(axis=2)
+        actions = np.where(actions < 3, actions, 0)  # ModelPlayer's fallback for an out-of-range action
+        chosen = slots[np.arange(slots.shape[0]), actions]  # canonical slot played by each variant
+        consistent = (chosen == chosen[:, :1]).all(axis=1)
+        for i, key in enumerate(chunk):
+            if consistent[i] and not _interchangeable_suits(canonical[i]):
+                cache.put(key, outputs[i, 0])
+    return cache
@@ -0,0 +1,279 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import math
+import time
+import sqlite3
+from multiprocessing import Pool
+from statistics import NormalDist
+
+from ai.tournament import _play_shard, _init_worker
+
+"""
+Persistent rating ledger: TrueSkill and Elo ratings of agents and checkpoints.
+
+RatingLedger keeps everything in one SQLite file (data/ratings.sqlite by
+default): the agents with their tournament spec (ai/tournament.py) and
+current ratings, and every game ever recorded. record() takes the per-game
+rows of the tournament runner, (deal, seat of a, score a, score b), stores
+them and updates both ratings deal by deal, so a new result never requires
+replaying the history (rebuild() does replay it, e.g. after changing the
+constants). The two games of a deal (one from each seat) share their cards
+and are strongly correlated, so they are rated as one result, decided by the
+total points of the pair: rating them as two independent games would shrink
+sigma about twice as fast as the evidence warrants.
+
+TrueSkill (two players, draws allowed) gives each agent a mean mu and an
+uncertainty sigma; the leaderboard is sorted by the conservative mu - 3 sigma.
+Elo (K = 16) is kept alongside for readability.
+
+play_scheduled() decides which games to play next: it ranks every pair by
+(sigma_a^2 + sigma_b^2) * match quality, i.e. uncertain agents facing
+opponents of similar strength, where a result moves the ratings the most,
+and plays a few deals of the best pairs on a process pool. With focus=name
+only the pairs of that agent are scheduled, which places a new checkpoint
+with few games. A pair plays deals 0, 1, 2, ... (game_rng(base_seed, deal)),
+each from both seats, so all pairs see the same deals.
+"""
+
+LEDGER_PATH = "data/ratings.sqlite"
+
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2
+TAU = SIGMA / 100
+DRAW_PROBABILITY = 0.03  # 60-60 games, 120-120 deals
+ELO_START = 1500.0
+ELO_K = 16.0
+
+_N = NormalDist()
+
+
+def draw_margin(p=DRAW_PROBABILITY, beta=BETA):
+    return _N.inv_cdf((p + 1) / 2) * math.sqrt(2) * beta
+
+
+def _v_win(t, e):
+    denom = _N.cdf(t - e)
+    return _N.pdf(t - e) / denom if denom > 1e-12 else e - t
+
+
+def _v_draw(t, e):
+    a = abs(t)
+    denom = _N.cdf(e - a) - _N.cdf(-e - a)
+    v = (_N.pdf(-e - a) - _N.pdf(e - a)) / denom if denom > 1e-12 else -a
+    return -v if t < 0 else v
+
+
+def _w_draw(t, e):
+    a = abs(t)
+    denom = _N.cdf(e - a) - _N.cdf(-e - a)
+    if denom <= 1e-12:
+        return 1.0
+    v = _v_draw(t, e)
+    return v * v + ((e - a) * _N.pdf(e - a) + (e + a) * _N.pdf(e + a)) / denom
+
+
+def trueskill_update(winner, loser, drawn=False):
+    """New (mu, sigma) of both players after one game; with drawn=True the order does not matter."""
+    (mu_w, sigma_w), (mu_l, sigma_l) = winner, loser
+    var_w = sigma_w ** 2 + TAU ** 2
+    var_l = sigma_l ** 2 + TAU ** 2
+    c = math.sqrt(2 * BETA ** 2 + var_w + var_l)
+    t = (mu_w - mu_l) / c
+    e = draw_margin() / c
+    if drawn:
+        v, w = _v_draw(t, e), _w_draw(t, e)
+    else:
+        v = _v_win(t, e)
+        w = v * (v + t - e)
+    mu_w += var_w / c * v
+    mu_l -= var_l / c * v
+    sigma_w = math.sqrt(var_w * max(1 - var_w / c ** 2 * w, 1e-6))
+    sigma_l = math.sqrt(var_l * max(1 - var_l / c ** 2 * w, 1e-6))
+    return (mu_w, sigma_w), (mu_l, sigma_l)
+
+
+def match_quality(a, b):
+    """TrueSkill draw-probability-like quality of a pairing, 1 for identical ratings."""
+    (mu_a, sigma_a), (mu_b, sigma_b) = a, b
+    c2 = 2 * BETA ** 2 + sigma_a ** 2 + sigma_b ** 2
+    return math.sqrt(2 * BETA ** 2 / c2) * math.exp(-(mu_a - mu_b) ** 2 / (2 * c2))
+
+
+def elo_update(r_a, r_b, score_a):
+    """score_a: 1 win, 0.5 draw, 0 loss."""
+    expected = 1 / (1 + 10 ** ((r_b - r_a) / 400))
+    delta = ELO_K * (score_a - expected)
+    return r_a + delta, r_b - delta
+
+
+class RatingLedger:
+    def __init__(self, path=LEDGER_PATH, base_seed=0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS agents (
+                name TEXT PRIMARY KEY, spec TEXT NOT NULL, mu REAL, sigma REAL, elo REAL,
+                games INTEGER DEFAULT 0, added REAL);
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY, time REAL, a TEXT, b TEXT, base_seed INTEGER, deal INTEGER,
+                seat_a INTEGER, score_a INTEGER, score_b INTEGER);
+            CREATE INDEX IF NOT EXISTS games_pair ON games (a, b);
+        """)
+        self.db.execute("INSERT OR IGNORE INTO meta VALUES ('base_seed', ?)", (str(base_seed),))
+        self.db.commit()
+        self.base_seed = int(self.db.execute("SELECT value FROM meta WHERE key = 'base_seed'").fetchone()[0])
+
+    def add_agent(self, name, spec):
+        row = self.db.execute("SELECT spec FROM agents WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            if row["spec"] != spec:
+                raise ValueError(f"Agent {name} is already rated with spec {row['spec']}")
+            return
+        self.db.execute("INSERT INTO agents VALUES (?, ?, ?, ?, ?, 0, ?)", (name, spec, MU, SIGMA, ELO_START, time.time()))
+        self.db.commit()
+
+    def agents(self):
+        return {row["name"]: dict(row) for row in self.db.execute("SELECT * FROM agents ORDER BY added")}
+
+    def leaderboard(self):
+        """Agents best first by the conservative rating mu - 3 sigma."""
+        return sorted(self.agents().values(), key=lambda a: -(a["mu"] - 3 * a["sigma"]))
+
+    def _apply(self, ratings, a, b, score_a, score_b, games=1):
+        ra, rb = ratings[a], ratings[b]
+        if score_a == score_b:
+            (ra["mu"], ra["sigma"]), (rb["mu"], rb["sigma"]) = trueskill_update(
+                (ra["mu"], ra["sigma"]), (rb["mu"], rb["sigma"]), drawn=True)
+        else:
+            win, lose = (ra, rb) if score_a > score_b else (rb, ra)
+            (win["mu"], win["sigma"]), (lose["mu"], lose["sigma"]) = trueskill_update(
+                (win["mu"], win["sigma"]), (lose["mu"], lose["sigma"]))
+        ra["elo"], rb["elo"] = elo_update(ra["elo"], rb["elo"], 1.0 if score_a > score_b else 0.5 if score_a == score_b else 0.0)
+        ra["games"] += games
+        rb["games"] += games
+
+    def _save(self, ratings, names):
+        self.db.executemany("UPDATE agents SET mu = ?, sigma = ?, elo = ?, games = ? WHERE name = ?",
+                            [(ratings[n]["mu"], ratings[n]["sigma"], ratings[n]["elo"], ratings[n]["games"], n)
+                             for n in names])
+
+    def record(self, name_a, name_b, rows, base_seed=None):
+        """Store tournament rows (deal, seat_a, score_a, score_b) of a pairing and update the ratings."""
+        ratings = self.agents()
+        base_seed = self.base_seed if base_seed is None else base_seed
+        now = time.time()
+        deals = _by_deal(rows)
+        for deal_rows in deals:
+            self._apply_deal(ratings, name_a, name_b, deal_rows)
+        # Stored grouped by deal, as rebuild() reads them back
+        self.db.executemany("INSERT INTO games (time, a, b, base_seed, deal, seat_a, score_a, score_b) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(now, name_a, name_b, base_seed, *row) for deal_rows in deals for row in deal_rows])
+        self._save(ratings, (name_a, name_b))
+        self.db.commit()
+
+    def _apply_deal(self, ratings, a, b, rows):
+        """One result for the games of a deal: a against b on the total points."""
+        self._apply(ratings, a, b, sum(r[-2] for r in rows), sum(r[-1] for r in rows), len(rows))
+
+    def rebuild(self):
+        """Recompute every rating from the recorded games, in the order they were recorded."""
+        ratings = self.agents()
+        for r in ratings.values():
+            r.update(mu=MU, sigma=SIGMA, elo=ELO_START, games=0)
+        key, deal_rows = None, []
+        # The rows of one record() call and deal are consecutive
+        for g in self.db.execute("SELECT time, a, b, base_seed, deal, score_a, score_b FROM games ORDER BY id"):
+            k = tuple(g)[:5]
+            if k != key and deal_rows:
+                self._apply_deal(ratings, key[1], key[2], deal_rows)
+                deal_rows = []
+            key = k
+            deal_rows.append(tuple(g))
+        if deal_rows:
+            self._apply_deal(ratings, key[1], key[2], deal_rows)
+        self._save(ratings, ratings)
+        self.db.commit()
+
+    def next_deal(self, a, b):
+        """First deal the pair has not played yet (on this ledger's base seed)."""
+        row = self.db.execute("SELECT MAX(deal) FROM games WHERE ((a = ? AND b = ?) OR (a = ? AND b = ?)) "
+                              "AND base_seed = ?", (a, b, b, a, self.base_seed)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def suggest(self, n=1, focus=None):
+        """The n pairs whose next games are the most informative: (sigma_a^2 + sigma_b^2) * match quality."""
+        agents = self.agents()
+        names = list(agents)
+        scored = []
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                if focus is not None and focus not in (a, b):
+                    continue
+                ra, rb = agents[a], agents[b]
+                info = (ra["sigma"] ** 2 + rb["sigma"] ** 2) * match_quality((ra["mu"], ra["sigma"]), (rb["mu"], rb["sigma"]))
+                scored.append((info, a, b))
+        scored.sort(reverse=True)
+        return [(a, b) for _, a, b in scored[:n]]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _by_deal(rows):
+    """Rows (deal, seat_a, score_a, score_b) grouped by deal, in order of first appearance."""
+    deals = {}
+    for row in rows:
+        deals.setdefault(row[0], []).append(row)
+    return list(deals.values())
+
+
+def play_scheduled(ledger, games=200, deals_per_match=2, workers=None, focus=None, sigma_target=None,
+                   threads_per_worker=1, log=print):
+    """
+    Play about `games` games on the most informative pairs, recording them as
+    they finish. Stops early once every scheduled agent (only `focus`, if
+    given) has sigma <= sigma_target, or when a round records no game.
+    """
+    if deals_per_match < 1:
+        raise ValueError(f"deals_per_match must be at least 1, got {deals_per_match}")
+    workers = workers or os.cpu_count()
+    played = 0
+    pool = None if workers == 1 else Pool(workers, initializer=_init_worker, initargs=(threads_per_worker,))
+    if pool is None:
+        _init_worker(threads_per_worker)
+    try:
+        while played < games:
+            agents = ledger.agents()
+            watched = [agents[focus]] if focus else list(agents.values())
+            if sigma_target is not None and all(a["sigma"] <= sigma_target for a in watched):
+                break
+            pairs = ledger.suggest(workers, focus)
+            if not pairs:
+                break
+            shards = [(a, agents[a]["spec"], b, agents[b]["spec"], ledger.base_seed,
+                       range(ledger.next_deal(a, b), ledger.next_deal(a, b) + deals_per_match)) for a, b in pairs]
+            results = map(_play_shard, shards) if pool is None else pool.imap(_play_shard, shards)
+            before = played
+            for a, b, rows in results:
+                ledger.record(a, b, rows)
+                played += len(rows)
+            if played == before:
+                break
+            log(f"{played} games | " + ", ".join(f"{a}-{b}" for a, b in pairs))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return played
@@ -0,0 +1,172 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import zipfile
+
+"""
+Model registry: names and versions → architecture and weight file.
+
+    registry.load("trainer")           # CNNBriscolaModel from ai/models/trainer_model.pt
+    registry.load("trainer@numpy")     # NumpyCNNBriscolaModel from ai/models/trainer_model.npz
+    registry.load("ckpt/model.pt")     # a path: the architecture follows the file (arch_for_path)
+    registry.lazy("rl")                # loaded on its first call
+
+A name without "@version" is the default version. Entries can be added
+with register() or in ai/models/registry.json
+({"name@version": {"arch": "cnn", "path": "..."}}), which is read the first
+time a name is resolved.
+
+Importing this module imports neither torch nor any model: architectures
+are built on first load, and loaded models are cached per process, so all
+the players of a process share one copy. State dicts are loaded with
+torch.load(mmap=True) and assigned to the parameters without copying, so
+processes loading the same file share its pages through the page cache.
+A "cnn" weight file is built with the architecture train_model.py saved
+next to it (model.pt → model.json, e.g. the channel widths a sweep trial
+sampled), or with the defaults when there is none.
+"""
+
+REGISTRY_PATH = "ai/models/registry.json"
+
+MODELS = {
+    "trainer": ("cnn", "ai/models/trainer_model.pt"),
+    "trainer@ts": ("torchscript", "ai/models/trainer_model.ts.pt"),
+    "trainer@int8": ("torchscript", "ai/models/trainer_model.int8.ts.pt"),
+    "trainer@numpy": ("numpy", "ai/models/trainer_model.npz"),
+    "rl": ("qnet", "ai/models/rl_agent.pt"),
+}
+
+_loaded = {}  # (arch, absolute path) → model
+_registry_read = False
+torch_threads = None  # applied when torch is first needed (tournament workers)
+
+
+def _torch():
+    import torch
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    return torch
+
+
+def _state_dict_model(model, path):
+    torch = _torch()
+    model.load_state_dict(torch.load(path, mmap=True, weights_only=True), assign=True)
+    model.eval()
+    return model
+
+
+def model_kwargs(path):
+    """CNNBriscolaModel arguments saved next to a weight file (<stem>.json by train_model.py), {} if none."""
+    config = os.path.splitext(path)[0] + ".json"
+    if not os.path.exists(config):
+        return {}
+    with open(config) as f:
+        return json.load(f)
+
+
+def _build_cnn(path):
+    from ai.models.network import CNNBriscolaModel
+    return _state_dict_model(CNNBriscolaModel(**model_kwargs(path)), path)
+
+
+def _build_qnet(path):
+    from ai.models.network import QNetwork
+    from ai.observation import GAME_FEATURES
+    return _state_dict_model(QNetwork(GAME_FEATURES, 3), path)
+
+
+def _build_torchscript(path):
+    model = _torch().jit.load(path)
+    model.eval()
+    return model
+
+
+def _build_numpy(path):
+    from ai.models.numpy_model import NumpyCNNBriscolaModel
+    return NumpyCNNBriscolaModel.load(path)
+
+
+ARCHITECTURES = {
+    "cnn": _build_cnn,
+    "qnet": _build_qnet,
+    "torchscript": _build_torchscript,
+    "numpy": _build_numpy,
+}
+
+
+def register(name, arch, path):
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture {arch!r} (one of {', '.join(ARCHITECTURES)})")
+    MODELS[name] = (arch, path)
+
+
+def _read_registry():
+    global _registry_read
+    _registry_read = True
+    if os.path.exists(REGISTRY_PATH):
+        with open(REGISTRY_PATH) as f:
+            for name, entry in json.load(f).items():
+                register(name, entry["arch"], entry["path"])
+
+
+def _is_torchscript(path):
+    """TorchScript archives hold code/ and constants.pkl; torch.save state dicts only data.pkl and data/."""
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as z:
+        return any(name.endswith("/constants.pkl") for name in z.namelist())
+
+
+def arch_for_path(path, default="cnn"):
+    """Architecture of a weight file: .npz NumPy, .ts.pt or any TorchScript archive, else `default`."""
+    if path.endswith(".npz"):
+        return "numpy"
+    if path.endswith(".ts.pt") or (os.path.isfile(path) and _is_torchscript(path)):
+        return "torchscript"
+    return default
+
+
+def resolve(name, arch=None):
+    """(architecture, weight path) of a registered name, or of a weight file path."""
+    if not _registry_read:
+        _read_registry()
+    entry = MODELS.get(name)
+    if entry is not None:
+        return entry
+    if name.endswith((".pt", ".npz")) or os.sep in name:
+        return arch or arch_for_path(name), name
+    raise KeyError(f"Unknown model {name!r}: register it or pass a weight file path")
+
+
+def load(name, arch=None):
+    """The model registered as `name` (or stored at that path), loaded once per process."""
+    arch, path = resolve(name, arch)
+    key = (arch, os.path.abspath(path))
+    model = _loaded.get(key)
+    if model is None:
+        model = _loaded[key] = ARCHITECTURES[arch](path)
+    return model
+
+
+class LazyModel:
+    """Stands for a registry model and loads it (and torch) on its first call."""
+    def __init__(self, name, arch=None):
+        self.name = name
+        self.arch, self.path = resolve(name, arch)
+        self.accepts_numpy = self.arch == "numpy"
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load(self.path, self.arch)
+        return self._model
+
+    def __call__(self, x):
+        return self.model(x)
+
+
+def lazy(name, arch=None):
+    return LazyModel(name, arch)
@@ -0,0 +1,212 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import math
+import time
+import itertools
+import statistics
+from multiprocessing import Pool
+
+from game.briscola import BriscolaGame
+from game.rng import game_rng, game_seed
+from ai import registry
+from ai.agents.rule_based import RuleBasedPlayer
+
+"""
+Multi-process tournament runner.
+
+Agents are described by spec strings so they can be rebuilt inside worker
+processes:
+    "rule"                 → RuleBasedPlayer
+    "model:<path>"         → ModelPlayer over the model at <path>, loaded as ai/registry.py
+                             picks it from the file (.npz NumPy, TorchScript, else a CNN state dict)
+    "ts:<path.ts.pt>"      → ModelPlayer over a TorchScript export (scripts/export_model.py)
+    "numpy:<path.npz>"     → ModelPlayer over NumpyCNNBriscolaModel (no torch import)
+    "rl:<path.pt>"         → RLAgent over a QNetwork loaded from <path.pt>
+    "model:<name>"         → a model of the registry, e.g. "model:trainer@numpy" (ai/registry.py)
+    "ismcts:<iterations>"  → ISMCTSPlayer with that many iterations per move
+Appending "+endgame" (e.g. "rule+endgame") adds the exact endgame solver;
+"+cache" gives a model player a PolicyCache per worker, preloaded from
+<model path stem>.cache.npz when it exists (scripts/build_policy_cache.py).
+
+Every deal is identified by its index: the deck and the starting player come
+from game_rng(base_seed, index) (game/rng.py) and randomized agents are
+seeded from the same pair, so the results do not depend on how deals are
+sharded across workers and any game can be replayed from its index. Each
+deal is played twice with the seats swapped, so both agents get both hands.
+
+Models are loaded through the registry on a player's first decision, once
+per worker process.
+"""
+
+_KIND_ARCH = {"model": None, "ts": "torchscript", "numpy": "numpy", "rl": "qnet"}  # None: registry.arch_for_path
+_worker_caches = {}  # (kind, path) → PolicyCache
+
+
+def _load_model(name, kind="model"):
+    """A lazily loaded registry model (ai/registry.py), shared by the players of this process."""
+    return registry.lazy(name, _KIND_ARCH[kind])
+
+
+def _load_cache(path, kind):
+    cache = _worker_caches.get((kind, path))
+    if cache is None:
+        from ai.policy_cache import PolicyCache
+        weights = registry.resolve(path, _KIND_ARCH[kind])[1]
+        cache = _worker_caches[(kind, path)] = PolicyCache(path=os.path.splitext(weights)[0] + ".cache.npz")
+    return cache
+
+
+def make_player(spec: str, name: str, seed=None):
+    """Build a fresh player for one game from its spec string (seed: for randomized agents)."""
+    spec, *extras = spec.split("+")
+    player = _make_base_player(spec, name, seed)
+    for extra in extras:
+        if extra == "endgame":
+            from ai.agents.endgame import with_endgame_solver
+            player.__class__ = with_endgame_solver(type(player))
+        elif extra == "cache":
+            if not hasattr(player, "cache"):
+                raise ValueError(f"+cache needs a model player, not {spec}")
+            kind, _, path = spec.partition(":")
+            player.cache = _load_cache(path, kind)
+        else:
+            raise ValueError(f"Unknown agent option: +{extra}")
+    return player
+
+
+def _make_base_player(spec, name, seed):
+    kind, _, arg = spec.partition(":")
+    if kind == "rule":
+        return RuleBasedPlayer(name)
+    if kind in ("model", "ts", "numpy"):
+        from ai.agents.model_player import ModelPlayer
+        return ModelPlayer(model=_load_model(arg, kind), name=name)
+    if kind == "rl":
+        from ai.agents.rl_agent import RLAgent
+        return RLAgent(_load_model(arg, kind), name=name)
+    if kind == "ismcts":
+        from ai.agents.ismcts import ISMCTSPlayer
+        return ISMCTSPlayer(name, iterations=int(arg or 1000), seed=seed)
+    raise ValueError(f"Unknown agent spec: {spec}")
+
+
+def _init_worker(threads):
+    # Only touch torch if it is already loaded: "numpy:" and "rule" workers never import it
+    registry.torch_threads = threads
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def play_deal(base_seed, deal, name_a, spec_a, name_b, spec_b):
+    """Play deal number `deal` from both seats. Returns [(deal, seat_of_a, score_a, score_b), ...]."""
+    rows = []
+    seed = game_seed(base_seed, deal)
+    for seat_a in (0, 1):
+        pa = make_player(spec_a, name_a, game_seed(seed, 0))
+        pb = make_player(spec_b, name_b, game_seed(seed, 1))
+        game = BriscolaGame(*((pa, pb) if seat_a == 0 else (pb, pa)), rng=game_rng(base_seed, deal))
+        game.play_game()
+        rows.append((deal, seat_a, game.scores[name_a], game.scores[name_b]))
+    return rows
+
+
+def _play_shard(args):
+    name_a, spec_a, name_b, spec_b, base_seed, deals = args
+    rows = []
+    for deal in deals:
+        rows += play_deal(base_seed, deal, name_a, spec_a, name_b, spec_b)
+    return name_a, name_b, rows
+
+
+def wilson_interval(successes, n, z=1.96):
+    """95% Wilson score interval for a binomial proportion."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return centre - half, centre + half
+
+
+def summarize(name_a, name_b, rows):
+    """Aggregate per-game rows of a pairing into statistics from name_a's point of view."""
+    n = len(rows)
+    wins = sum(1 for r in rows if r[2] > r[3])
+    losses = sum(1 for r in rows if r[2] < r[3])
+    draws = n - wins - losses
+    scores_a = [r[2] for r in rows]
+    scores_b = [r[3] for r in rows]
+    low, high = wilson_interval(wins, n)
+    return {
+        "agent": name_a,
+        "opponent": name_b,
+        "games": n,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "win_rate": wins / n if n else 0.0,
+        "win_rate_ci95": (low, high),
+        "mean_score": statistics.fmean(scores_a) if n else 0.0,
+        "std_score": statistics.pstdev(scores_a) if n else 0.0,
+        "opponent_mean_score": statistics.fmean(scores_b) if n else 0.0,
+        "score_quartiles": statistics.quantiles(scores_a, n=4) if n > 1 else scores_a,
+    }
+
+
+def run_tournament(agents, n_deals=50, base_seed=0, workers=None, shard_size=None, threads_per_worker=1):
+    """
+    Round-robin between all agents ({name: spec}). Every pairing plays n_deals
+    deals from both seats (2 * n_deals games). By default the deals are split
+    into about 4 shards per worker (at most 25 deals each), so a small
+    tournament still keeps every worker busy.
+
+    Returns (summaries, rows): one summary dict per pairing and the raw
+    per-game rows keyed by (name_a, name_b).
+    """
+    names = list(agents)
+    if shard_size is None:
+        n_pairs = len(names) * (len(names) - 1) // 2
+        shard_size = min(25, max(1, math.ceil(n_deals * n_pairs / (4 * (workers or os.cpu_count() or 1)))))
+    shards = [
+        (a, agents[a], b, agents[b], base_seed, range(i, min(i + shard_size, n_deals)))
+        for a, b in itertools.combinations(names, 2)
+        for i in range(0, n_deals, shard_size)
+    ]
+
+    start = time.perf_counter()
+    rows = {pair: [] for pair in itertools.combinations(names, 2)}
+    if workers == 1:
+        _init_worker(threads_per_worker)
+        results = map(_play_shard, shards)
+        for a, b, shard_rows in results:
+            rows[(a, b)] += shard_rows
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+            # Shards come back in submission order, so the merged rows are deterministic
+            for a, b, shard_rows in pool.imap(_play_shard, shards):
+                rows[(a, b)] += shard_rows
+    elapsed = time.perf_counter() - start
+
+    summaries = [summarize(a, b, pair_rows) for (a, b), pair_rows in rows.items()]
+    total_games = sum(len(r) for r in rows.values())
+    for s in summaries:
+        s["elapsed_sec"] = elapsed
+        s["games_per_sec"] = total_games / elapsed if elapsed > 0 else float("inf")
+    return summaries, rows
+
+
+def print_report(summaries):
+    for s in summaries:
+        low, high = s["win_rate_ci95"]
+        print(f"\n=== {s['agent']} vs {s['opponent']} ===")
+        print(f"Games: {s['games']}  (W {s['wins']} / L {s['losses']} / D {s['draws']})")
+        print(f"Win rate {s['agent']}: {s['win_rate']:.2%}  (95% CI {low:.2%} - {high:.2%})")
+        print(f"Average score - {s['agent']}: {s['mean_score']:.2f} ± {s['std_score']:.2f}"
+              f"  quartiles {', '.join(f'{q:g}' for q in s['score_quartiles'])}")
+        print(f"Average score - {s['opponent']}: {s['opponent_mean_score']:.2f}")
+    if summaries:
+        print(f"\nThroughput: {summaries[0]['games_per_sec']:.1f} games/sec")
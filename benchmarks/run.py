@@ -0,0 +1,253 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+from game.rng import game_rng
+
+"""
+Benchmark suite: engine, agents, encoding, data generation and training.
+
+    python benchmarks/run.py                          # all benchmarks → benchmarks/results/<time>.json
+    python benchmarks/run.py games model_decisions    # a subset
+    python benchmarks/run.py --compare benchmarks/results/baseline.json
+
+Every benchmark runs in its own child process, so its peak RSS
+(ru_maxrss) is its own and an import in one benchmark (torch) cannot
+speed up or slow down another. A benchmark returns its throughput as
+{"rate": ..., "unit": ...}; with --repeat the best of the repeats is kept.
+
+--compare prints the ratio against an earlier result file and exits with
+status 1 if any rate dropped by more than --tolerance (default 10%).
+"""
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MODEL_PATH = "ai/models/trainer_model.pt"
+
+
+def _timed(n, unit, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"rate": n / elapsed, "unit": unit, "n": n, "seconds": elapsed}
+
+
+def bench_games(scale):
+    """BriscolaGame.play_game, RuleBasedPlayer vs RuleBasedPlayer."""
+    from game.briscola import BriscolaGame
+    from ai.agents.rule_based import RuleBasedPlayer
+    n = int(2000 * scale)
+
+    def run():
+        for game_id in range(n):
+            BriscolaGame(RuleBasedPlayer("A"), RuleBasedPlayer("B"), rng=game_rng(0, game_id)).play_game()
+    return _timed(n, "games/s", run)
+
+
+def _decisions(model, n_games):
+    from game.briscola import BriscolaGame
+    from ai.agents.rule_based import RuleBasedPlayer
+    from ai.agents.model_player import ModelPlayer
+
+    def run():
+        for game_id in range(n_games):
+            BriscolaGame(ModelPlayer(model), RuleBasedPlayer("Rule"), rng=game_rng(0, game_id)).play_game()
+    return _timed(20 * n_games, "decisions/s", run)  # 20 cards played per player and game
+
+
+def bench_model_decisions(scale):
+    """ModelPlayer with the eager torch CNNBriscolaModel (whole games vs RuleBasedPlayer)."""
+    import torch
+    from ai.models.network import CNNBriscolaModel
+    torch.set_num_threads(1)
+    model = CNNBriscolaModel()
+    model.load_state_dict(torch.load(MODEL_PATH))
+    model.eval()
+    return _decisions(model, int(200 * scale))
+
+
+def bench_model_decisions_numpy(scale):
+    """ModelPlayer with NumpyCNNBriscolaModel: the weights are read from a temporary .npz, torch is never imported."""
+    from ai.models.numpy_model import NumpyCNNBriscolaModel
+    # Export in a separate process so this one never imports torch
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.npz")
+        subprocess.run([sys.executable, "-c",
+                        "import sys, numpy, torch; sd = torch.load(sys.argv[1]); "
+                        "numpy.savez(sys.argv[2], **{k: v.numpy() for k, v in sd.items()})",
+                        MODEL_PATH, path], check=True)
+        model = NumpyCNNBriscolaModel.load(path)
+    result = _decisions(model, int(200 * scale))
+    assert "torch" not in sys.modules
+    return result
+
+
+def bench_dataset_rows(scale):
+    """generate_sequential_data (CSV rows, RuleBasedPlayer self-play)."""
+    from scripts.generate_dataset import generate_sequential_data
+    n_games = int(500 * scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dataset.csv")
+        random.seed(0)
+        start = time.perf_counter()
+        generate_sequential_data(n_games, path)
+        elapsed = time.perf_counter() - start
+        with open(path) as f:
+            rows = sum(1 for _ in f) - 1
+    return {"rate": rows / elapsed, "unit": "rows/s", "n": rows, "seconds": elapsed}
+
+
+def bench_training(scale):
+    """One epoch of train_one_epoch over int8 shards (batch 1024, Adam, one thread)."""
+    import torch
+    from scripts.generate_dataset import generate_dataset_shards
+    from scripts.train_model import train_one_epoch
+    from ai.dataset import ShardDataset, ShardLoader
+    from ai.models.network import CNNBriscolaModel
+    torch.set_num_threads(1)
+    torch.manual_seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_dataset_shards(int(2000 * scale), tmp, workers=1)
+        loader = ShardLoader(ShardDataset(tmp), batch_size=1024, seed=0)
+        model = CNNBriscolaModel()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-2)
+        _, _, rate = train_one_epoch(model, loader, optimizer, torch.nn.CrossEntropyLoss())
+        samples = len(loader.dataset)
+    return {"rate": rate, "unit": "samples/s", "n": samples, "seconds": samples / rate}
+
+
+def bench_search_nodes(scale):
+    """Position expansions with the compact state of game/state.py (apply_move)."""
+    from scripts.benchmark_state import positions
+    from game import state as compact
+    states = [(g.snapshot()[0], m) for g, m in positions()]
+    n = int(200_000 * scale)
+
+    def run():
+        for i in range(n):
+            compact.apply_move(*states[i % len(states)])
+    return _timed(n, "nodes/s", run)
+
+
+BENCHMARKS = {
+    "games": bench_games,
+    "model_decisions": bench_model_decisions,
+    "model_decisions_numpy": bench_model_decisions_numpy,
+    "dataset_rows": bench_dataset_rows,
+    "training": bench_training,
+    "search_nodes": bench_search_nodes,
+}
+
+
+def _child(name, scale):
+    """Run one benchmark in this process and print its result as JSON."""
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    result = BENCHMARKS[name](scale)
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps(result))
+
+
+def run_one(name, scale=1.0, repeat=1):
+    """Best of `repeat` child runs (highest rate; peak RSS is the largest seen)."""
+    best = None
+    peak = 0.0
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--scale", str(scale)],
+                             check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        peak = max(peak, result["peak_rss_mb"])
+        if best is None or result["rate"] > best["rate"]:
+            best = result
+    best["peak_rss_mb"] = peak
+    return best
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    versions = {}
+    for module in ("numpy", "torch"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **versions,
+    }
+
+
+def compare(results, baseline, tolerance=0.1):
+    """Print rate ratios against a baseline; returns the names that regressed by more than `tolerance`."""
+    regressions = []
+    print(f"\n{'benchmark':<24} {'baseline':>14} {'now':>14} {'ratio':>7}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        ratio = result["rate"] / old["rate"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24} {old['rate']:>14,.1f} {result['rate']:>14,.1f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Briscola benchmark suite.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the work of every benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark, best one kept")
+    parser.add_argument("--out", default=None, help="result file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", default=None, metavar="BASELINE.json")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed rate drop for --compare")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.scale)
+        return 0
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        result = results[name] = run_one(name, args.scale, args.repeat)
+        print(f"{name:<24} {result['rate']:>14,.1f} {result['unit']:<12} peak RSS {result['peak_rss_mb']:>7.1f} MB")
+
+    report = {"meta": {**_metadata(), "scale": args.scale, "repeat": args.repeat}, "results": results}
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
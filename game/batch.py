@@ -0,0 +1,143 @@
+import random
+import numpy as np
+from game import instrument
+from game.cards import N_CARDS, CARD_VALUE, CARD_SUIT, CARD_POINTS_BY_ID, TRICK_WINNER
+from game.rng import game_seed
+
+"""
+Vectorized Briscola engine.
+
+N independent games are stored as NumPy arrays and advanced in lockstep, one
+card (or one full trick) per call. Cards are encoded as integers 0..39 in the
+same order used by Deck(): card_id = suit_index * 10 + (value - 1).
+
+The rules follow BriscolaGame exactly (dealing order, briscola at the bottom
+of the deck, determine_trick_winner, winner draws first), so a batch built
+with from_seeds() replays the same games as BriscolaGame under random.seed(),
+and from_game_ids() the games of BriscolaGame(..., rng=game_rng(base_seed, id)).
+"""
+
+HAND_SIZE = 3
+N_TRICKS = N_CARDS // 2
+EMPTY = -1
+
+VALUE_TABLE = np.array(CARD_VALUE, dtype=np.int8)
+SUIT_TABLE = np.array(CARD_SUIT, dtype=np.int8)
+POINTS_TABLE = np.array(CARD_POINTS_BY_ID, dtype=np.int16)
+WINNER_TABLE = np.array(TRICK_WINNER, dtype=np.int8)
+
+
+class BatchBriscola:
+    def __init__(self, decks, starting_players):
+        """
+        decks: (N, 40) card ids in Deck.cards order (the last column is drawn first).
+        starting_players: (N,) index (0 or 1) of the player leading the first trick.
+        """
+        decks = np.asarray(decks, dtype=np.int8)
+        self.n_games = decks.shape[0]
+        self._rows = np.arange(self.n_games)
+
+        # BriscolaGame draws the top card as briscola and puts it at the bottom,
+        # so the stock is drawn as deck[38], deck[37], ..., deck[0], briscola.
+        self.briscola_card = decks[:, -1].copy()
+        self.briscola_suit = SUIT_TABLE[self.briscola_card]
+        self.stock = np.concatenate([decks[:, -2::-1], decks[:, -1:]], axis=1)
+        self.draw_pos = 0
+
+        # One spare column so removing a card is a single gather
+        self.hands = np.full((self.n_games, 2, HAND_SIZE + 1), EMPTY, dtype=np.int8)
+        self.hand_len = np.zeros((self.n_games, 2), dtype=np.int8)
+        for _ in range(HAND_SIZE):
+            for seat in (0, 1):
+                self._give(np.full(self.n_games, seat), self.stock[:, self.draw_pos])
+                self.draw_pos += 1
+
+        self.scores = np.zeros((self.n_games, 2), dtype=np.int16)
+        self.leader = np.asarray(starting_players, dtype=np.int8).copy()
+        self.lead_card = np.full(self.n_games, EMPTY, dtype=np.int8)
+        self.last_played = np.full((self.n_games, 2), EMPTY, dtype=np.int8)  # last card of each seat
+        self.tricks_played = 0
+
+    @classmethod
+    def from_seeds(cls, seeds):
+        """Build the games BriscolaGame would play after random.seed(seed)."""
+        decks = np.empty((len(seeds), N_CARDS), dtype=np.int8)
+        starting = np.empty(len(seeds), dtype=np.int8)
+        for i, seed in enumerate(seeds):
+            rng = random.Random(seed)
+            order = list(range(N_CARDS))
+            rng.shuffle(order)
+            decks[i] = order
+            starting[i] = rng.choice([0, 1])
+        return cls(decks, starting)
+
+    @classmethod
+    def from_game_ids(cls, game_ids, base_seed=0):
+        """Build games by id (game/rng.py), the same as BriscolaGame with rng=game_rng(base_seed, id)."""
+        return cls.from_seeds([game_seed(base_seed, i) for i in game_ids])
+
+    @property
+    def to_move(self) -> np.ndarray:
+        """Seat of the player who has to play next in each game."""
+        if self.lead_card[0] == EMPTY:
+            return self.leader
+        return 1 - self.leader
+
+    @property
+    def done(self) -> bool:
+        return self.tricks_played == N_TRICKS
+
+    def current_hands(self) -> np.ndarray:
+        """(N, 3) hands of the players to move, EMPTY-padded, in Player.hand order."""
+        return self.hands[self._rows, self.to_move, :HAND_SIZE]
+
+    @instrument.section("engine.batch_play")
+    def play(self, actions):
+        """Each player to move plays the card at index actions[i] of their hand."""
+        actions = np.asarray(actions)
+        seats = self.to_move
+        if np.any((actions < 0) | (actions >= self.hand_len[self._rows, seats])):
+            raise ValueError("Not a valid index.")
+
+        hands = self.hands[self._rows, seats]
+        cards = hands[self._rows, actions]
+        cols = np.arange(HAND_SIZE + 1)
+        src = np.minimum(cols + (cols >= actions[:, None]), HAND_SIZE)
+        self.hands[self._rows, seats] = np.take_along_axis(hands, src, axis=1)
+        self.hand_len[self._rows, seats] -= 1
+        self.last_played[self._rows, seats] = cards
+
+        if self.lead_card[0] == EMPTY:
+            self.lead_card = cards
+        else:
+            self._resolve(self.lead_card, cards)
+            self.lead_card = np.full(self.n_games, EMPTY, dtype=np.int8)
+        return cards
+
+    def step(self, lead_actions, follow_actions):
+        """Play one full trick in every game."""
+        self.play(lead_actions)
+        self.play(follow_actions)
+
+    def trick_winner(self, lead, follow) -> np.ndarray:
+        """Vectorized determine_trick_winner: 1 where the follower wins, 0 otherwise."""
+        return WINNER_TABLE[lead, follow, self.briscola_suit]
+
+    def _resolve(self, lead, follow):
+        winner = np.where(self.trick_winner(lead, follow) == 1, 1 - self.leader, self.leader)
+        self.scores[self._rows, winner] += POINTS_TABLE[lead] + POINTS_TABLE[follow]
+        self.leader = winner.astype(np.int8)
+        self.tricks_played += 1
+
+        if self.draw_pos < N_CARDS:
+            self._give(winner, self.stock[:, self.draw_pos])
+            self._give(1 - winner, self.stock[:, self.draw_pos + 1])
+            self.draw_pos += 2
+
+    def _give(self, seats, cards):
+        self.hands[self._rows, seats, self.hand_len[self._rows, seats]] = cards
+        self.hand_len[self._rows, seats] += 1
+
+    def winners(self) -> np.ndarray:
+        """Winning seat per game (ties go to seat 0, like max() over BriscolaGame.scores)."""
+        return np.where(self.scores[:, 1] > self.scores[:, 0], 1, 0)
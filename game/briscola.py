@@ -1,82 +1,209 @@
-from game.cards import Deck, Card, Suit
+from game.cards import Deck, Card, Suit, CARDS, SUIT_INDEX, CARD_POINTS_BY_ID, TRICK_WINNER
+from game.state import NO_CARD, mask_of
 from game.player import Player
+from game.events import NULL_SINK, START, DEAL, PLAY, TRICK, DRAW, GAME_OVER
+from game import instrument
 import random
+from typing import List, Optional
 
 class BriscolaGame:
-    def __init__(self, player1: Player, player2: Player):
-        self.deck = Deck()
+    def __init__(self, player1: Player, player2: Player, events=None, rng=None):
+        # rng deals the deck and picks the starting player: pass game_rng(base_seed, game_id)
+        # (game/rng.py) to make the game reproducible from its id; the global generator if None
+        rng = rng or random
+        self.deck = Deck(rng)
         self.players = [player1, player2]
         self.scores = {player1.name: 0, player2.name: 0}
-        self.starting_player_index = random.choice([0,1])
+        self.starting_player_index = rng.choice([0,1])
+        self.table: List[Card] = []  # cards played in the current trick, leader first
+        self.played_cards: List[Card] = []
+        self.last_played: List[Optional[Card]] = [None, None]  # last card played by each seat
+        for seat, player in enumerate(self.players):
+            player.game = self
+            player.seat = seat
+
+        # Game events go to a sink (silent by default, see game/events.py)
+        self.events = events if events is not None else NULL_SINK
+        emit = self.events.emit
 
         # Draw the briscola card and set the trump suit
         self.briscola_card = self.deck.draw()
         self.briscola_suit = self.briscola_card.suit
+        self.briscola_index = SUIT_INDEX[self.briscola_suit]
         self.deck.cards.insert(0, self.briscola_card)  # Put it at the bottom
+        emit((START, player1.name, player2.name, self.briscola_card.id, self.starting_player_index))
 
         # Deal initial hands (3 cards each)
         for _ in range(3):
-            for player in self.players:
-                player.receive_card(self.deck.draw())
+            for seat, player in enumerate(self.players):
+                card = self.deck.draw()
+                player.receive_card(card)
+                emit((DEAL, seat, card.id))
 
+        # Draw order of the remaining deck, shared by every snapshot of this game
+        self._deck_cards = list(self.deck.cards)
+        self._stock = tuple(card.id for card in reversed(self._deck_cards))
+        self._undo = []
+
+    @instrument.section("engine.play_turn")
     def play_turn(self, first_player_index: int) -> int:
         """Plays a single turn of the game, where each player plays one card."""
-        p1 = self.players[self.starting_player_index]
-        p2 = self.players[1 - self.starting_player_index]
-
-        # Show hands (for debug or console version)
-        print(f"{p1.name}'s hand: {p1.show_hand()}")
-        print(f"{p2.name}'s hand: {p2.show_hand()}")
+        emit = self.events.emit
+        first = self.starting_player_index
+        p1 = self.players[first]
+        p2 = self.players[1 - first]
 
         # Each player plays a card
         card1 = p1.play_card()
+        emit((PLAY, first, card1.id))
+        self.table.append(card1)
+        self.last_played[first] = card1
         card2 = p2.play_card()
+        emit((PLAY, 1 - first, card2.id))
+        self.last_played[1 - first] = card2
+        self.table.clear()
+        self.played_cards += (card1, card2)
 
+        # Determine who wins the trick and draw (winner draws first)
+        winner_seat, points, drawn = self._finish_trick(first, card1, card2)
+        emit((TRICK, winner_seat, points))
+        for seat, card in zip((winner_seat, 1 - winner_seat), drawn):
+            emit((DRAW, seat, card.id))
 
-        print(f"{p1.name} plays {card1}")
-        print(f"{p2.name} plays {card2}")
+        return self.starting_player_index
 
-        # Determine who wins the trick
+    def _finish_trick(self, first: int, card1: Card, card2: Card):
+        """Score a complete trick, update the leader and let both players draw."""
+        p1 = self.players[first]
+        p2 = self.players[1 - first]
         winner = self.determine_trick_winner(p1, card1, p2, card2)
-        self.scores[winner.name] += card1.points() + card2.points()
-
-        print(f"{winner.name} wins the trick.\n")
+        points = CARD_POINTS_BY_ID[card1.id] + CARD_POINTS_BY_ID[card2.id]
+        self.scores[winner.name] += points
 
         # Update starting player for the next turn
-        self.starting_player_index = self.players.index(winner)
+        self.starting_player_index = first if winner is p1 else 1 - first
 
         # Each player draws a new card (winner draws first)
+        drawn = ()
         if not self.deck.is_empty():
-            winner.receive_card(self.deck.draw())
-            loser = p1 if winner == p2 else p2
-            loser.receive_card(self.deck.draw())
-
-        return self.starting_player_index
+            drawn = (self.deck.draw(), self.deck.draw())
+            winner.receive_card(drawn[0])
+            self.players[1 - self.starting_player_index].receive_card(drawn[1])
+        return self.starting_player_index, points, drawn
 
+    @instrument.section("engine.determine_trick_winner")
     def determine_trick_winner(self, p1: Player, c1: Card, p2: Player, c2: Card) -> Player:
-        # Same suit → it wins the one with higher value
-        if c1.suit == c2.suit:
-            return p1 if c1.value > c2.value else p2
-        
-        # One card is briscola → it wins
-        if c1.suit == self.briscola_suit and c2.suit != self.briscola_suit:
-            return p1
-        if c2.suit == self.briscola_suit and c1.suit != self.briscola_suit:
-            return p2
-
-        # No briscola cards played and different suits → no one wins
-        return self.players[self.starting_player_index]
+        # Same suit → higher value wins; otherwise a briscola wins; otherwise the card led wins
+        return p2 if TRICK_WINNER[c1.id][c2.id][self.briscola_index] else p1
 
 
+    @instrument.section("engine.play_game")
     def play_game(self):
         """Plays the entire game until the players run out of cards."""
         current_player_index = 0
         while self.players[0].has_cards():
             current_player_index = self.play_turn(current_player_index)
 
-        # Final result
-        print("\n=== GAME OVER ===")
-        for name, score in self.scores.items():
-            print(f"{name}: {score} points")
-        winner = max(self.scores, key=self.scores.get)
-        print(f"Winner: {winner}")
+        p1, p2 = self.players
+        self.events.emit((GAME_OVER, self.scores[p1.name], self.scores[p2.name]))
+
+    # ------------------------------------------------------------------
+    # Search API: compact snapshots and reversible moves (no agents, no events)
+    # ------------------------------------------------------------------
+
+    @property
+    def to_move(self) -> int:
+        """Seat of the player who has to play next."""
+        return self.starting_player_index if not self.table else 1 - self.starting_player_index
+
+    def legal_moves(self):
+        """Card ids the player to move may play."""
+        return [card.id for card in self.players[self.to_move].hand]
+
+    def snapshot(self):
+        """
+        Immutable snapshot (state, hand_order, played) built from a few ints:
+        state is the compact search state of game/state.py, hand_order packs
+        the order of both hands and the last card of each seat (6 bits per
+        slot) and played packs the cards already played, in play order.
+        """
+        p0, p1 = self.players
+        order = 0
+        for shift, card in enumerate(p0.hand):
+            order |= (card.id + 1) << (6 * shift)
+        for shift, card in enumerate(p1.hand, 3):
+            order |= (card.id + 1) << (6 * shift)
+        for shift, card in enumerate(self.last_played, 6):
+            if card is not None:
+                order |= (card.id + 1) << (6 * shift)
+        state = (mask_of(p0.hand), mask_of(p1.hand), self._stock, len(self._stock) - len(self.deck),
+                 self.briscola_index, self.scores[p0.name], self.scores[p1.name],
+                 self.starting_player_index, self.table[0].id if self.table else NO_CARD)
+        played = 0
+        for shift, card in enumerate(self.played_cards):
+            played |= (card.id + 1) << (6 * shift)
+        return state, order, played
+
+    def restore(self, snapshot):
+        """Put the game back in the position of a snapshot() taken from this game, reusing its lists."""
+        state, order, played = snapshot
+        p0, p1 = self.players
+        for shift, player in ((0, p0), (3, p1)):
+            player.hand.clear()
+            for i in range(shift, shift + 3):
+                cid = (order >> (6 * i)) & 63
+                if cid:
+                    player.hand.append(CARDS[cid - 1])
+        for seat in (0, 1):
+            cid = (order >> (6 * (6 + seat))) & 63
+            self.last_played[seat] = CARDS[cid - 1] if cid else None
+        # The deck is always a prefix of the draw order
+        deck, size = self.deck.cards, len(self._stock) - state[3]
+        del deck[size:]
+        for i in range(len(deck), size):
+            deck.append(self._deck_cards[i])
+        self.scores[p0.name], self.scores[p1.name] = state[5], state[6]
+        self.starting_player_index = state[7]
+        self.table.clear()
+        if state[8] != NO_CARD:
+            self.table.append(CARDS[state[8]])
+        self.played_cards.clear()
+        while played:
+            self.played_cards.append(CARDS[(played & 63) - 1])
+            played >>= 6
+        self._undo.clear()
+
+    def apply_move(self, card_id: int):
+        """Play card_id for the player to move; undo_move() reverts it."""
+        seat = self.to_move
+        hand = self.players[seat].hand
+        index = next(i for i, c in enumerate(hand) if c.id == card_id)
+        card = hand.pop(index)
+        previous = self.last_played[seat]
+        self.last_played[seat] = card
+        if not self.table:
+            self.table.append(card)
+            self._undo.append((seat, index, card, previous, None))
+            return
+        lead = self.table.pop()
+        leader = self.starting_player_index
+        self.played_cards += (lead, card)
+        trick = self._finish_trick(leader, lead, card)
+        self._undo.append((seat, index, card, previous, (lead, leader) + trick))
+
+    def undo_move(self):
+        seat, index, card, previous, trick = self._undo.pop()
+        self.last_played[seat] = previous
+        if trick is not None:
+            lead, leader, winner_seat, points, drawn = trick
+            if drawn:
+                # Put the drawn cards back on the deck (the loser drew last)
+                self.deck.cards.append(self.players[1 - winner_seat].hand.pop())
+                self.deck.cards.append(self.players[winner_seat].hand.pop())
+            self.scores[self.players[winner_seat].name] -= points
+            self.starting_player_index = leader
+            del self.played_cards[-2:]
+            self.table.append(lead)
+        else:
+            self.table.pop()
+        self.players[seat].hand.insert(index, card)
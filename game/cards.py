@@ -17,24 +17,80 @@ CARD_POINTS = {
     # 2, 4, 5, 6, 7 → 0 points
 }
 
+"""
+Compact card encoding: each of the 40 cards is an int 0..39,
+card_id = suit_index * 10 + (value - 1), i.e. the order in which Deck() builds them.
+All per-card properties are precomputed tables indexed by card_id.
+"""
+
+N_CARDS = 40
+SUITS = tuple(Suit)
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+CARD_VALUE = tuple(value for _ in SUITS for value in range(1, 11))
+CARD_SUIT = tuple(i for i in range(len(SUITS)) for _ in range(1, 11))
+CARD_POINTS_BY_ID = tuple(CARD_POINTS.get(value, 0) for value in CARD_VALUE)
+# Strength used to compare two cards of the same suit (see BriscolaGame.determine_trick_winner)
+CARD_STRENGTH = CARD_VALUE
+
+def _trick_winner(lead: int, follow: int, trump: int) -> int:
+    if CARD_SUIT[lead] == CARD_SUIT[follow]:
+        return 0 if CARD_STRENGTH[lead] > CARD_STRENGTH[follow] else 1
+    if CARD_SUIT[follow] == trump:
+        return 1
+    return 0
+
+# TRICK_WINNER[lead][follow][trump] → 0 if the card led wins the trick, 1 if the answer wins
+TRICK_WINNER = tuple(
+    tuple(tuple(_trick_winner(lead, follow, trump) for trump in range(len(SUITS))) for follow in range(N_CARDS))
+    for lead in range(N_CARDS)
+)
+
+def card_id(value: int, suit: Suit) -> int:
+    return SUIT_INDEX[suit] * 10 + value - 1
+
 class Card:
-    def __init__(self, value: int, suit: Suit):
-        self.value = value  # From 1 to 10
-        self.suit = suit
+    __slots__ = ("value", "suit", "id")
+    _interned = {}
+
+    def __new__(cls, value: int, suit: Suit):
+        # Cards are interned: Card(v, s) always returns the same object
+        card = cls._interned.get((value, suit))
+        if card is None:
+            card = object.__new__(cls)
+            card.value = value  # From 1 to 10
+            card.suit = suit
+            card.id = card_id(value, suit)
+            cls._interned[(value, suit)] = card
+        return card
+
+    @staticmethod
+    def from_id(cid: int) -> "Card":
+        return CARDS[cid]
 
     def points(self) -> int: # Calculate points for the card based on its value
-        return CARD_POINTS.get(self.value, 0)
+        return CARD_POINTS_BY_ID[self.id]
 
     def __repr__(self): # String representation of the card
         return f"{self.value} di {self.suit.value}"
 
     def __eq__(self, other): # Check equality of two cards
-        return self.value == other.value and self.suit == other.suit
+        return self is other or (isinstance(other, Card) and self.id == other.id)
+
+    def __hash__(self):
+        return self.id
+
+    def __reduce__(self): # Unpickle to the interned instance
+        return Card, (self.value, self.suit)
+
+# All 40 cards, indexed by card_id
+CARDS = tuple(Card(value, suit) for suit in SUITS for value in range(1, 11))
 
 class Deck:
-    def __init__(self):
-        self.cards = [Card(value, suit) for suit in Suit for value in range(1, 11)]
-        random.shuffle(self.cards)
+    def __init__(self, rng=None):
+        # rng: a random.Random (game/rng.py); the global generator if None
+        self.cards = list(CARDS)
+        (rng or random).shuffle(self.cards)
 
     def draw(self) -> Card: # Draw a card from the deck
         if self.cards:
@@ -46,4 +102,3 @@ class Deck:
 
     def __len__(self): # Return the number of cards in the deck
         return len(self.cards)
-
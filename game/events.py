@@ -0,0 +1,145 @@
+import json
+import queue
+from collections import deque
+from game.cards import CARDS
+
+"""
+Game event stream.
+
+BriscolaGame emits every event as a small tuple of ints (plus the player
+names in START) to a sink. Nothing is formatted unless a human-readable
+sink such as ConsoleSink is attached.
+
+    (START, name0, name1, briscola_card_id, starting_seat)
+    (DEAL, seat, card_id)
+    (PLAY, seat, card_id)
+    (TRICK, winner_seat, points)
+    (DRAW, seat, card_id)
+    (GAME_OVER, score0, score1)
+"""
+
+START, DEAL, PLAY, TRICK, DRAW, GAME_OVER = range(6)
+EVENT_NAMES = ("start", "deal", "play", "trick", "draw", "game_over")
+
+
+class NullSink:
+    """Discards every event (default for bulk simulation)."""
+    def emit(self, event):
+        pass
+
+    def close(self):
+        pass
+
+NULL_SINK = NullSink()
+
+
+class RingBufferSink:
+    """Keeps the last `capacity` events in memory for debugging."""
+    def __init__(self, capacity=10000):
+        self.events = deque(maxlen=capacity)
+        self.emit = self.events.append
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+
+class JsonlRecorder:
+    """Writes one JSON array per event, e.g. [2, 0, 17], for later replay."""
+    def __init__(self, path_or_file):
+        self._owns_file = isinstance(path_or_file, str)
+        self.file = open(path_or_file, "w") if self._owns_file else path_or_file
+
+    def emit(self, event):
+        self.file.write(json.dumps(event, separators=(",", ":")))
+        self.file.write("\n")
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+def read_jsonl(path):
+    """Yield the events recorded by JsonlRecorder as tuples."""
+    with open(path) as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+class ConsoleSink:
+    """Human-readable sink printing the same log the console game used to print."""
+    def __init__(self, out=print):
+        self.out = out
+        self.names = ("", "")
+        self.hands = ([], [])
+        self.on_table = 0
+
+    def emit(self, event):
+        kind = event[0]
+        if kind == START:
+            self.names = (event[1], event[2])
+            self.hands = ([], [])
+            self.on_table = 0
+        elif kind in (DEAL, DRAW):
+            self.hands[event[1]].append(CARDS[event[2]])
+        elif kind == PLAY:
+            seat, card = event[1], CARDS[event[2]]
+            if self.on_table == 0:
+                for s in (seat, 1 - seat):
+                    hand = ', '.join(f"[{i}] {c}" for i, c in enumerate(self.hands[s]))
+                    self.out(f"{self.names[s]}'s hand: {hand}")
+            self.hands[seat].remove(card)
+            self.on_table += 1
+            self.out(f"{self.names[seat]} plays {card}")
+        elif kind == TRICK:
+            self.on_table = 0
+            self.out(f"{self.names[event[1]]} wins the trick.\n")
+        elif kind == GAME_OVER:
+            self.out("\n=== GAME OVER ===")
+            for name, score in zip(self.names, event[1:]):
+                self.out(f"{name}: {score} points")
+            winner = self.names[1] if event[2] > event[1] else self.names[0]
+            self.out(f"Winner: {winner}")
+
+    def close(self):
+        pass
+
+
+class QueueSink:
+    """
+    Puts every event on a queue (queue.Queue or multiprocessing.Queue) for a
+    consumer in another thread or process, such as the GUI. With block=False
+    events are dropped when the queue is full, so a slow consumer never slows
+    the game down.
+    """
+    def __init__(self, q, block=True):
+        self.queue = q
+        self.block = block
+        self.dropped = 0
+
+    def emit(self, event):
+        try:
+            self.queue.put(event, block=self.block)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        pass
+
+
+class MultiSink:
+    """Forwards every event to several sinks."""
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
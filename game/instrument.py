@@ -0,0 +1,236 @@
+import sys
+import os
+import json
+import time
+import runpy
+import argparse
+import threading
+import functools
+from collections import Counter
+
+"""
+Opt-in instrumentation: per-section timers and counters.
+
+Hot paths are marked with @section("name") (engine turns and trick
+resolution, encoders, model forward calls), loaders are wrapped with
+iterate("name", loader) (time waiting for each batch) and every
+Player subclass's play_card is wrapped as "agent.<Class>.play_card". The
+decision is taken when the function is defined: with instrumentation off,
+section() returns the function itself, so a disabled run executes exactly
+the same code as before. Turn it on before the game / ai modules are
+imported, with BRISCOLA_INSTRUMENT=1 or by running a script through this
+module:
+
+    python -m game.instrument --json stats.json scripts/evaluate_model.py --games 200 --workers 1
+    python -m game.instrument --prom stats.prom --cprofile run.prof scripts/train_model.py --epochs 1
+    python -m game.instrument --sample run.folded scripts/evaluate_model.py
+
+Section times are inclusive (a section nested in another counts in both).
+Statistics are per process: run process-pool jobs with one worker to see
+everything. --sample writes collapsed stacks ("a;b;c count" lines), the
+input format of flamegraph.pl, speedscope and inferno, like py-spy's
+--format raw.
+"""
+
+ENABLED = os.environ.get("BRISCOLA_INSTRUMENT", "") not in ("", "0")
+
+_lock = threading.Lock()
+_sections = {}  # name → [calls, total ns, max ns]
+_counters = Counter()
+
+
+def enable():
+    """Instrument everything defined from now on (call before importing the modules to measure)."""
+    global ENABLED
+    ENABLED = True
+
+
+def _record(name, elapsed):
+    with _lock:
+        stats = _sections.get(name)
+        if stats is None:
+            stats = _sections[name] = [0, 0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+
+
+def timed(name, fn):
+    """fn wrapped with a timer for section `name`."""
+    clock = time.perf_counter_ns
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(name, clock() - start)
+    return wrapper
+
+
+def section(name):
+    """Decorator: time calls under `name` when instrumentation is on, no-op otherwise."""
+    def decorate(fn):
+        return timed(name, fn) if ENABLED else fn
+    return decorate
+
+
+def iterate(name, iterable):
+    """Time every next() of an iterable under `name` (e.g. the wait for a batch); unchanged when off."""
+    if not ENABLED:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+
+def _timed_iter(name, it):
+    clock = time.perf_counter_ns
+    while True:
+        start = clock()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        _record(name, clock() - start)
+        yield item
+
+
+def count(name, n=1):
+    """Add n to a counter; callers on hot paths guard it with `if instrument.ENABLED`."""
+    with _lock:
+        _counters[name] += n
+
+
+def reset():
+    with _lock:
+        _sections.clear()
+        _counters.clear()
+
+
+def snapshot() -> dict:
+    with _lock:
+        sections = {
+            name: {"calls": calls, "total_sec": total / 1e9, "mean_us": total / calls / 1e3,
+                   "max_us": peak / 1e3}
+            for name, (calls, total, peak) in sorted(_sections.items())
+        }
+        return {"time": time.time(), "pid": os.getpid(), "sections": sections, "counters": dict(_counters)}
+
+
+def to_json(path, snap=None):
+    with open(path, "w") as f:
+        json.dump(snap or snapshot(), f, indent=2)
+
+
+def to_prometheus(snap=None) -> str:
+    """Prometheus text exposition format of a snapshot."""
+    snap = snap or snapshot()
+    lines = [
+        "# HELP briscola_section_seconds_total Cumulative time spent in an instrumented section.",
+        "# TYPE briscola_section_seconds_total counter",
+    ]
+    lines += [f'briscola_section_seconds_total{{section="{name}"}} {s["total_sec"]:.9f}'
+              for name, s in snap["sections"].items()]
+    lines += ["# HELP briscola_section_calls_total Calls of an instrumented section.",
+              "# TYPE briscola_section_calls_total counter"]
+    lines += [f'briscola_section_calls_total{{section="{name}"}} {s["calls"]}'
+              for name, s in snap["sections"].items()]
+    lines += ["# HELP briscola_events_total Instrumentation counters.",
+              "# TYPE briscola_events_total counter"]
+    lines += [f'briscola_events_total{{name="{name}"}} {value}' for name, value in snap["counters"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def print_report(snap=None):
+    snap = snap or snapshot()
+    print(f"\n{'section':<44} {'calls':>10} {'total s':>9} {'mean µs':>9} {'max µs':>9}")
+    for name, s in sorted(snap["sections"].items(), key=lambda kv: -kv[1]["total_sec"]):
+        print(f"{name:<44} {s['calls']:>10,} {s['total_sec']:>9.3f} {s['mean_us']:>9.1f} {s['max_us']:>9.1f}")
+    for name, value in snap["counters"].items():
+        print(f"{name:<44} {value:>10,}")
+
+
+class StackSampler:
+    """Samples the stack of one thread every `interval` seconds into collapsed-stack counts."""
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+def run_script(path, argv, json_path=None, prom_path=None, cprofile_path=None, sample_path=None,
+               interval=0.005):
+    """Run a script as __main__ with instrumentation on, then export the statistics."""
+    enable()
+    sys.argv = [path] + list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    profiler = sampler = None
+    if cprofile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if sample_path:
+        sampler = StackSampler(interval).start()
+    try:
+        runpy.run_path(path, run_name="__main__")
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(sample_path)
+        snap = snapshot()
+        if json_path:
+            to_json(json_path, snap)
+        if prom_path:
+            with open(prom_path, "w") as f:
+                f.write(to_prometheus(snap))
+        if not json_path and not prom_path:
+            print_report(snap)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a script with instrumentation and optional profiling.")
+    parser.add_argument("--json", help="write the section/counter snapshot as JSON")
+    parser.add_argument("--prom", help="write the snapshot in Prometheus text format")
+    parser.add_argument("--cprofile", help="also run under cProfile and dump the stats here")
+    parser.add_argument("--sample", help="sample the main thread's stack into collapsed-stack format here")
+    parser.add_argument("--interval", type=float, default=0.005, help="sampling interval in seconds")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    run_script(args.script, args.args, args.json, args.prom, args.cprofile, args.sample, args.interval)
+
+
+if __name__ == "__main__":
+    # Enable the shared module (game.instrument), not this __main__ copy
+    from game import instrument
+    instrument.main()
@@ -1,10 +1,19 @@
 from game.cards import Card
+from game import instrument
 from typing import List
 
 class Player:
     def __init__(self, name: str):
         self.name = name
         self.hand: List[Card] = []
+        self.game = None  # set by BriscolaGame, lets agents observe the table
+        self.seat = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every agent's decision is a section when instrumentation is on (game/instrument.py)
+        if instrument.ENABLED and "play_card" in cls.__dict__:
+            cls.play_card = instrument.timed(f"agent.{cls.__name__}.play_card", cls.__dict__["play_card"])
 
     def receive_card(self, card: Card):
         """Receve a card and add it to the player's hand."""
@@ -0,0 +1,190 @@
+import os
+import mmap
+import random
+import struct
+import numpy as np
+from game.briscola import BriscolaGame
+from game.player import Player
+from game.events import PLAY, GAME_OVER
+
+"""
+Compact binary game records.
+
+A game is fully determined by the seed of its rng (game/rng.py: the deck and
+the starting player) and the 40 cards in the order they were played, so a
+record is
+
+    seed    u64    BriscolaGame(..., rng=random.Random(seed)) deals the game
+    plays   40 B   card ids in play order
+    tag     u8 length + UTF-8 bytes (e.g. "rule|model", who sat where)
+
+49 bytes plus the tag per game (59 for "rule|model"), and 8 more in the
+index. Records are appended to a data file (8-byte header b"BGR1" +
+version) and the offset of every record to <path>.idx (little endian u64).
+The index is written after its record, so a crash can only leave an
+unindexed tail, which the next writer truncates.
+
+GameRecordReader memory-maps both files: len(reader) and reader[i] cost the
+same for the first and the millionth game. replay() plays a record back
+through BriscolaGame (events included), and
+ai/agents/rl_agent.py::record_transitions streams the RL transitions of
+records for offline training.
+"""
+
+MAGIC = b"BGR1"
+VERSION = 1
+HEADER = MAGIC + struct.pack("<HH", VERSION, 0)
+N_PLAYS = 40
+_FIXED = struct.Struct("<Q40sB")
+
+
+class GameRecord:
+    __slots__ = ("seed", "plays", "tag")
+
+    def __init__(self, seed: int, plays: bytes, tag: str = ""):
+        self.seed = seed
+        self.plays = plays
+        self.tag = tag
+
+    def pack(self) -> bytes:
+        tag = self.tag.encode()
+        return _FIXED.pack(self.seed, self.plays, len(tag)) + tag
+
+    def new_game(self):
+        """A fresh BriscolaGame with this record's deal between two plain Players (for apply_move)."""
+        return BriscolaGame(Player("P0"), Player("P1"), rng=random.Random(self.seed))
+
+
+class RecordingSink:
+    """Event sink collecting the plays of one game; passes the GameRecord to on_record at GAME_OVER."""
+    def __init__(self, seed, tag="", on_record=None):
+        self.seed = seed
+        self.tag = tag
+        self.on_record = on_record
+        self.plays = bytearray()
+        self.record = None
+
+    def emit(self, event):
+        if event[0] == PLAY:
+            self.plays.append(event[2])
+        elif event[0] == GAME_OVER:
+            self.record = GameRecord(self.seed, bytes(self.plays), self.tag)
+            if self.on_record is not None:
+                self.on_record(self.record)
+
+    def close(self):
+        pass
+
+
+class GameRecordWriter:
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.data = open(path, "ab")
+        self.index = open(self.index_path, "ab")
+        if new:
+            self.data.write(HEADER)
+            self.index.truncate(0)
+        else:
+            self._recover()
+        self.offset = self.data.tell()
+
+    def _recover(self):
+        """Drop a record that was written without its index entry (interrupted writer)."""
+        with open(self.path, "rb") as f:
+            if f.read(len(HEADER))[:4] != MAGIC:
+                raise ValueError(f"{self.path} is not a game record file")
+        offsets = np.fromfile(self.index_path, dtype="<u8") if os.path.exists(self.index_path) else []
+        end = len(HEADER)
+        if len(offsets):
+            with open(self.path, "rb") as f:
+                f.seek(int(offsets[-1]))
+                fixed = f.read(_FIXED.size)
+                end = int(offsets[-1]) + _FIXED.size + fixed[-1]
+        self.data.truncate(end)
+        self.index.truncate(len(offsets) * 8)
+        self.data.seek(0, os.SEEK_END)
+        self.index.seek(0, os.SEEK_END)
+
+    def write(self, record: GameRecord):
+        if len(record.plays) != N_PLAYS:
+            raise ValueError(f"A game record has {N_PLAYS} plays, got {len(record.plays)}")
+        packed = record.pack()
+        self.data.write(packed)
+        self.data.flush()
+        self.index.write(struct.pack("<Q", self.offset))
+        self.offset += len(packed)
+
+    def sink(self, seed: int, tag: str = ""):
+        """Event sink for BriscolaGame(..., events=sink, rng=random.Random(seed)) that records the game."""
+        return RecordingSink(seed, tag, self.write)
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(len(HEADER))[:4] != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a game record file")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_path = path + ".idx"
+        size = os.path.getsize(index_path)
+        self.offsets = np.memmap(index_path, dtype="<u8", mode="r") if size else np.zeros(0, dtype="<u8")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i) -> GameRecord:
+        offset = int(self.offsets[i])
+        seed, plays, tag_len = _FIXED.unpack_from(self._mmap, offset)
+        start = offset + _FIXED.size
+        return GameRecord(seed, plays, self._mmap[start:start + tag_len].decode())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayPlayer(Player):
+    """Plays the next card of a record; both seats share one iterator over the plays."""
+    def __init__(self, name, moves):
+        super().__init__(name)
+        self.moves = moves
+
+    def play_card(self):
+        card = next(self.moves)
+        for i, c in enumerate(self.hand):
+            if c.id == card:
+                return self.hand.pop(i)
+        raise ValueError(f"Corrupt game record: card {card} is not in {self.name}'s hand")
+
+
+def replay(record: GameRecord, events=None):
+    """Play a record back through BriscolaGame (emitting events); returns the finished game."""
+    moves = iter(record.plays)
+    game = BriscolaGame(ReplayPlayer("P0", moves), ReplayPlayer("P1", moves), events=events,
+                        rng=random.Random(record.seed))
+    game.play_game()
+    return game
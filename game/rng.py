@@ -0,0 +1,37 @@
+import random
+
+"""
+Per-game random number generators.
+
+A game is identified by its id (and the base seed of the run). game_seed()
+derives the game's 64-bit seed from the pair with a counter-based mix
+(SplitMix64: the id is the counter, the mixed base seed the key), so a game
+never depends on which process plays it, on how games are sharded, or on
+any game played before it, and can be regenerated from its id alone.
+
+    game = BriscolaGame(p1, p2, rng=game_rng(base_seed, game_id))
+
+game_rng() returns a random.Random, which BriscolaGame and Deck use for the
+shuffle and the starting player: random.Random(s) deals exactly what
+random.seed(s) dealt through the global generator, so BatchBriscola can
+rebuild the same deals from the seeds (BatchBriscola.from_game_ids).
+"""
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _mix64(z: int) -> int:
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def game_seed(base_seed: int, game_id: int) -> int:
+    """64-bit seed of game `game_id` of a run seeded with `base_seed`."""
+    return _mix64((_mix64(base_seed & MASK64) + (game_id + 1) * GOLDEN_GAMMA) & MASK64)
+
+
+def game_rng(base_seed: int, game_id: int) -> random.Random:
+    return random.Random(game_seed(base_seed, game_id))
+
@@ -0,0 +1,109 @@
+import random
+from game.cards import N_CARDS, CARD_POINTS_BY_ID, TRICK_WINNER, SUIT_INDEX
+
+"""
+Compact immutable game state for search.
+
+A state is a plain tuple of ints (plus one shared tuple for the stock):
+
+    (hand0, hand1, stock, draw_pos, trump, score0, score1, leader, lead)
+
+hand0/hand1 are 40-bit masks of card ids, stock is the tuple of card ids in
+draw order (shared by every state of a game, never copied), draw_pos the
+index of the next card to draw, trump the suit index of the briscola, leader
+the seat that leads the current trick and lead the card it led (NO_CARD if
+the trick has not started). Applying a move builds one new tuple and no
+other Python objects.
+"""
+
+HAND0, HAND1, STOCK, DRAW_POS, TRUMP, SCORE0, SCORE1, LEADER, LEAD = range(9)
+NO_CARD = -1
+
+
+def cards_in(mask: int):
+    """Card ids contained in a hand mask, lowest first."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def mask_of(cards) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.id
+    return mask
+
+
+def to_move(state) -> int:
+    return state[LEADER] if state[LEAD] == NO_CARD else 1 - state[LEADER]
+
+
+def legal_moves(state):
+    return cards_in(state[HAND0 + to_move(state)])
+
+
+def is_terminal(state) -> bool:
+    return state[HAND0] == 0 and state[HAND1] == 0
+
+
+def apply_move(state, card: int):
+    """Return the state after the player to move plays `card` (a card id in their hand)."""
+    hand0, hand1, stock, draw_pos, trump, score0, score1, leader, lead = state
+    bit = 1 << card
+    if lead == NO_CARD:
+        if leader == 0:
+            return (hand0 ^ bit, hand1, stock, draw_pos, trump, score0, score1, leader, card)
+        return (hand0, hand1 ^ bit, stock, draw_pos, trump, score0, score1, leader, card)
+
+    if leader == 0:
+        hand1 ^= bit
+    else:
+        hand0 ^= bit
+    winner = 1 - leader if TRICK_WINNER[lead][card][trump] else leader
+    points = CARD_POINTS_BY_ID[lead] + CARD_POINTS_BY_ID[card]
+    if winner == 0:
+        score0 += points
+    else:
+        score1 += points
+
+    # Winner draws first
+    if draw_pos < len(stock):
+        first, second = 1 << stock[draw_pos], 1 << stock[draw_pos + 1]
+        if winner == 0:
+            hand0 |= first
+            hand1 |= second
+        else:
+            hand1 |= first
+            hand0 |= second
+        draw_pos += 2
+    return (hand0, hand1, stock, draw_pos, trump, score0, score1, winner, NO_CARD)
+
+
+def from_game(game):
+    """Compact state of a BriscolaGame (hands, stock, scores, trick in progress)."""
+    return game.snapshot()[0]
+
+
+# Zobrist keys: a random 64-bit key per (seat, card in hand), per card led,
+# for seat 1 leading and per trump suit. A position's hash is the XOR of its keys.
+_rng = random.Random(0x5EED)
+ZOBRIST_HAND = tuple(tuple(_rng.getrandbits(64) for _ in range(N_CARDS)) for _ in range(2))
+ZOBRIST_LEAD = tuple(_rng.getrandbits(64) for _ in range(N_CARDS))
+ZOBRIST_LEADER = _rng.getrandbits(64)
+ZOBRIST_TRUMP = tuple(_rng.getrandbits(64) for _ in range(len(SUIT_INDEX)))
+
+
+def zobrist_hash(state) -> int:
+    """Hash of the remaining cards, the card led, the leader and the trump suit."""
+    h = ZOBRIST_TRUMP[state[TRUMP]]
+    for seat in (0, 1):
+        for card in cards_in(state[HAND0 + seat]):
+            h ^= ZOBRIST_HAND[seat][card]
+    if state[LEAD] != NO_CARD:
+        h ^= ZOBRIST_LEAD[state[LEAD]]
+    if state[LEADER] == 1:
+        h ^= ZOBRIST_LEADER
+    return h
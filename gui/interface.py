@@ -2,126 +2,349 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import queue
+import argparse
+import threading
+import traceback
 import tkinter as tk
-from game.cards import Deck
-from game.player import Player
+from game.cards import CARDS
 from game.briscola import BriscolaGame
-from ai.agents.rule_based import RuleBasedPlayer
-from ai.agents.model_player import ModelPlayer
-from ai.models.network import CNNBriscolaModel
-import torch
+from game.events import QueueSink, RingBufferSink, START, DEAL, PLAY, TRICK, DRAW, GAME_OVER
+from game.rng import game_rng, game_seed
+from ai import registry
 
+"""
+Observer GUI: a viewer over a stream of game events (game/events.py).
 
-class BriscolaGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Briscola AI vs RL (Observer Mode)")
+The games are played somewhere else and the GUI only folds their events
+into what it shows, so Tk callbacks never run an agent:
+
+  - LiveSource plays games between two agent specs (ai/tournament.py) in a
+    background thread and receives their events through a queue;
+  - RecordSource replays the games of a record file (game/records.py) on
+    demand;
+  - scripts/record_games.py --watch ID streams one game of a batch run from
+    the worker playing it (events are dropped rather than slowing it down).
+
+The events received are kept per game, so the view can be paused, stepped,
+fast-forwarded to the latest event, scrubbed back and forth, and moved to
+another game. The speed is in events per second.
+
+    python gui/interface.py                                   # RL agent (or rule) vs model
+    python gui/interface.py --a rule --b model:trainer@numpy
+    python gui/interface.py --records data/games.bgr --game 42
+"""
+
+POLL_MS = 50
+
+
+class GameView:
+    """What the table looks like after a prefix of a game's events."""
+    def __init__(self, events=()):
+        self.names = ("", "")
+        self.briscola = None
+        self.hands = ([], [])
+        self.table = []  # (seat, card) of the current trick, kept until the next card is played
+        self.scores = [0, 0]
+        self.deck = 0
+        self.status = ""
+        self.over = False
+        self.missing = 0  # cards played that were never dealt here: events dropped by a QueueSink(block=False)
+        self._trick_done = False
+        for event in events:
+            self.apply(event)
+
+    def apply(self, event):
+        kind = event[0]
+        if kind == START:
+            self.__init__()
+            self.names = (event[1], event[2])
+            self.briscola = CARDS[event[3]]
+            self.deck = 40
+            self.status = f"{event[1 + event[4]]} leads"
+        elif kind in (DEAL, DRAW):
+            self.hands[event[1]].append(CARDS[event[2]])
+            self.deck = max(self.deck - 1, 0)
+        elif kind == PLAY:
+            if self._trick_done:
+                self.table = []
+                self._trick_done = False
+            card = CARDS[event[2]]
+            hand = self.hands[event[1]]
+            if card in hand:
+                hand.remove(card)
+            else:
+                self.missing += 1
+            self.table.append((event[1], card))
+        elif kind == TRICK:
+            self.scores[event[1]] += event[2]
+            self._trick_done = True
+            self.status = f"{self.names[event[1]]} wins the trick (+{event[2]} pts)"
+        elif kind == GAME_OVER:
+            # The final scores resync the view even when events were dropped
+            self.scores = [event[1], event[2]]
+            self.hands = ([], [])
+            self.deck = 0
+            self.over = True
+            if event[1] == event[2]:
+                self.status = "=== GAME OVER === Draw"
+            else:
+                self.status = f"=== GAME OVER === Winner: {self.names[int(event[2] > event[1])]}"
+
+
+class LiveSource:
+    """Games played in a background thread; their events arrive through a queue."""
+    def __init__(self, spec_a, spec_b, base_seed=0, names=("Player_A", "Player_B")):
+        self.specs = (spec_a, spec_b)
+        self.names = names
+        self.base_seed = base_seed
+        self.queue = queue.Queue()
+        self.games = []  # events of every game received so far
+        self.next_game = 0
+        self.error = None  # last exception of the game thread, shown in the status line
+        self._thread = None
+
+    def start_game(self):
+        """Play the next game in the background (ignored while one is still running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._play, args=(self.next_game,), daemon=True)
+        self._thread.start()
+        self.next_game += 1
+
+    def _play(self, game_id):
+        try:
+            from ai.tournament import make_player
+            seed = game_seed(self.base_seed, game_id)
+            players = [make_player(spec, name, game_seed(seed, seat))
+                       for seat, (spec, name) in enumerate(zip(self.specs, self.names))]
+            BriscolaGame(*players, events=QueueSink(self.queue), rng=game_rng(self.base_seed, game_id)).play_game()
+        except Exception as e:
+            # A thread's exceptions are otherwise lost
+            traceback.print_exc()
+            self.error = f"Game {game_id + 1} failed: {e!r}"
+
+    def poll(self):
+        """Move the queued events into self.games; returns True if any arrived."""
+        received = False
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                return received
+            if event[0] == START or not self.games:
+                self.games.append([])
+            self.games[-1].append(event)
+            received = True
+
+    def __len__(self):
+        return len(self.games)
+
+    def __getitem__(self, i):
+        return self.games[i]
+
+
+class WatchSource(LiveSource):
+    """Events of games played by another process (scripts/record_games.py --watch)."""
+    def __init__(self, q):
+        super().__init__(None, None)
+        self.queue = q
+
+    def start_game(self):
+        pass
+
+
+class RecordSource:
+    """Games of a record file, replayed when they are viewed."""
+    def __init__(self, path):
+        from game.records import GameRecordReader
+        self.reader = GameRecordReader(path)
+        self._cache = {}
+
+    def start_game(self):
+        pass
 
-        self.deck = Deck()
+    def poll(self):
+        return False
 
-        # Load model for ModelPlayer
-        model = CNNBriscolaModel()
-        model.load_state_dict(torch.load("ai/models/trainer_model.pt"))
-        model.eval()
+    def __len__(self):
+        return len(self.reader)
 
-        # Define players
-        self.player1 = RuleBasedPlayer("RL_Agent")  # placeholder for RL agent
-        self.player2 = ModelPlayer(model=model, name="Model_AI")
+    def __getitem__(self, i):
+        events = self._cache.get(i)
+        if events is None:
+            from game.records import replay
+            sink = RingBufferSink()
+            replay(self.reader[i], events=sink)
+            events = self._cache[i] = list(sink)
+        return events
 
-        self.game = BriscolaGame(self.player1, self.player2)
-        self.current_index = self.game.starting_player_index
 
-        # Layout
+class BriscolaGUI:
+    def __init__(self, root, source, game=0, speed=2.0):
+        self.root = root
+        self.root.title("Briscola (Observer Mode)")
+        self.source = source
+        self.game = game
+        self.pos = 0  # events of the current game shown
+        self.view = GameView()
+        self.playing = True
+
+        # Table
         self.main_frame = tk.Frame(root)
         self.main_frame.pack(padx=10, pady=10)
-
         self.score_frame = tk.Frame(root)
         self.score_frame.pack(pady=5)
+        self.score_labels = [tk.Label(self.score_frame, text="", font=("Arial", 12)) for _ in range(2)]
+        for i, label in enumerate(self.score_labels):
+            label.grid(row=0, column=i, padx=20)
+        self.hand_labels = [
+            tk.Label(self.main_frame, text="", font=("Courier", 12), anchor="w", justify="left"),
+            tk.Label(self.main_frame, text="", font=("Courier", 12), anchor="e", justify="right"),
+        ]
+        self.hand_labels[0].grid(row=0, column=0, padx=10)
+        self.hand_labels[1].grid(row=0, column=2, padx=10)
+        self.play_area = tk.Label(self.main_frame, text="", font=("Arial", 16), width=40)
+        self.play_area.grid(row=0, column=1, padx=10)
+        self.status_label = tk.Label(root, text="", font=("Arial", 12))
+        self.status_label.pack(pady=5)
 
-        self.score_label_rl = tk.Label(self.score_frame, text="", font=("Arial", 12))
-        self.score_label_rl.grid(row=0, column=0, padx=20)
+        # Controls
+        controls = tk.Frame(root)
+        controls.pack(pady=5)
+        tk.Button(controls, text="◀ Game", command=lambda: self.show_game(self.game - 1)).pack(side="left")
+        tk.Button(controls, text="⏮", command=lambda: self.seek(0)).pack(side="left")
+        self.play_button = tk.Button(controls, text="Pause", width=6, command=self.toggle)
+        self.play_button.pack(side="left")
+        tk.Button(controls, text="Step", command=self.step).pack(side="left")
+        tk.Button(controls, text="⏭", command=self.fast_forward).pack(side="left")
+        tk.Button(controls, text="Game ▶", command=self.next_game).pack(side="left")
+        self.speed = tk.Scale(controls, from_=0.5, to=50, resolution=0.5, orient="horizontal",
+                              label="events/s", length=150)
+        self.speed.set(speed)
+        self.speed.pack(side="left", padx=10)
+        self.game_label = tk.Label(root, text="", font=("Arial", 10))
+        self.game_label.pack()
+        self.scrubber = tk.Scale(root, from_=0, to=0, orient="horizontal", length=500, showvalue=False)
+        self.scrubber.pack(pady=5)
+        # Bound to the mouse rather than command=, which also fires when render() moves the slider
+        self.scrubber.bind("<B1-Motion>", self._on_scrub)
+        self.scrubber.bind("<ButtonRelease-1>", self._on_scrub)
 
-        self.score_label_ai = tk.Label(self.score_frame, text="", font=("Arial", 12))
-        self.score_label_ai.grid(row=0, column=1, padx=20)
+        self.source.start_game()
+        self.root.after(POLL_MS, self._poll)
+        self.root.after(self._delay(), self._tick)
 
-        self.hand_rl = tk.Label(self.main_frame, text="", font=("Courier", 12), anchor="w", justify="left")
-        self.hand_rl.grid(row=0, column=0, padx=10)
+    @property
+    def events(self):
+        return self.source[self.game] if self.game < len(self.source) else []
 
-        self.play_area = tk.Label(self.main_frame, text="", font=("Arial", 16), width=40)
-        self.play_area.grid(row=0, column=1, padx=10)
+    def _delay(self):
+        return max(1, int(1000 / float(self.speed.get())))
 
-        self.hand_ai = tk.Label(self.main_frame, text="", font=("Courier", 12), anchor="e", justify="right")
-        self.hand_ai.grid(row=0, column=2, padx=10)
+    def _poll(self):
+        # Drain the event queue; never blocks the Tk loop
+        try:
+            if self.source.poll():
+                self._refresh_controls()
+            error = getattr(self.source, "error", None)
+            if error:
+                self.status_label.config(text=error)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            # An exception must not stop the polling: the viewer would freeze for good
+            self.root.after(POLL_MS, self._poll)
 
-        self.status_label = tk.Label(root, text="", font=("Arial", 12))
-        self.status_label.pack(pady=5)
+    def _tick(self):
+        try:
+            if self.playing:
+                self.step()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self.root.after(self._delay(), self._tick)
 
-        self.card1 = None
-        self.card2 = None
-        self.p1 = None
-        self.p2 = None
+    def step(self):
+        events = self.events
+        if self.pos < len(events):
+            self.view.apply(events[self.pos])
+            self.pos += 1
+            self.render()
+        elif self.playing and self.view.over and self.game + 1 < len(self.source):
+            self.show_game(self.game + 1)
 
-        # Start the game
-        self.root.after(2500, self.play_phase_1)
+    def seek(self, pos):
+        """Show the table after the first `pos` events of the current game."""
+        events = self.events
+        self.pos = max(0, min(pos, len(events)))
+        self.view = GameView(events[:self.pos])
+        self.render()
+
+    def fast_forward(self):
+        self.seek(len(self.events))
+
+    def toggle(self):
+        self.playing = not self.playing
+        self.play_button.config(text="Pause" if self.playing else "Play")
+
+    def show_game(self, i):
+        if 0 <= i < len(self.source):
+            self.game = i
+            self.seek(0)
+
+    def next_game(self):
+        if self.game + 1 < len(self.source):
+            self.show_game(self.game + 1)
+        else:
+            self.source.start_game()
+
+    def _on_scrub(self, _event):
+        if self.scrubber.get() != self.pos:
+            self.seek(self.scrubber.get())
+
+    def _refresh_controls(self):
+        self.scrubber.config(to=len(self.events))
+        self.scrubber.set(self.pos)
+        self.game_label.config(text=f"Game {self.game + 1} / {len(self.source)}, "
+                                    f"event {self.pos} / {len(self.events)}")
+
+    def render(self):
+        view = self.view
+        for seat in (0, 1):
+            self.hand_labels[seat].config(
+                text=f"{view.names[seat]}\n" + "\n".join(f"{i+1}) {card}" for i, card in enumerate(view.hands[seat])))
+            self.score_labels[seat].config(text=f"{view.names[seat]} score: {view.scores[seat]}")
+        table = "\n".join(f"{view.names[seat]} plays: {card}" for seat, card in view.table)
+        briscola = f"Briscola: {view.briscola} | deck: {view.deck}" if view.briscola else ""
+        self.play_area.config(text=f"{table}\n\n{briscola}")
+        status = view.status + (f" ({view.missing} event(s) dropped)" if view.missing else "")
+        self.status_label.config(text=getattr(self.source, "error", None) or status)
+        self._refresh_controls()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch Briscola games.")
+    parser.add_argument("--a", default=None, help="agent spec of seat 0 (default: the RL agent, or rule)")
+    parser.add_argument("--b", default="model:trainer", help="agent spec of seat 1")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the live games")
+    parser.add_argument("--records", default=None, help="browse the games of a record file instead")
+    parser.add_argument("--game", type=int, default=0, help="first game to show")
+    parser.add_argument("--speed", type=float, default=2.0, help="events per second")
+    args = parser.parse_args(argv)
+
+    if args.records:
+        source = RecordSource(args.records)
+    elif args.a:
+        source = LiveSource(args.a, args.b, args.seed)
+    else:
+        # No trained RL agent yet (scripts/train_rl.py): a rule-based player takes its seat
+        spec_a = "rl:rl" if os.path.exists(registry.resolve("rl")[1]) else "rule"
+        source = LiveSource(spec_a, args.b, args.seed, names=("RL_Agent", "Model_AI"))
+    root = tk.Tk()
+    BriscolaGUI(root, source, game=args.game, speed=args.speed)
+    root.mainloop()
 
-    def play_phase_1(self):
-        if not self.player1.has_cards():
-            self.end_game()
-            return
 
-        self.p1 = self.game.players[self.game.starting_player_index]
-        self.p2 = self.game.players[1 - self.game.starting_player_index]
-
-        self.card1 = self.p1.play_card()
-        self.play_area.config(text=f"{self.p1.name} plays: {self.card1}")
-
-        self.update_hand_display()
-        self.root.after(2500, self.play_phase_2)
-
-    def play_phase_2(self):
-        self.card2 = self.p2.play_card()
-        current = self.play_area.cget("text")
-        self.play_area.config(text=current + f"\n{self.p2.name} plays: {self.card2}")
-
-        self.update_hand_display()
-        self.root.after(2000, self.play_phase_3)
-
-    def play_phase_3(self):
-        winner = self.game.determine_trick_winner(self.p1, self.card1, self.p2, self.card2)
-        points = self.card1.points() + self.card2.points()
-        self.game.scores[winner.name] += points
-        self.game.starting_player_index = self.game.players.index(winner)
-
-        if not self.deck.is_empty():
-            winner.receive_card(self.deck.draw())
-            loser = self.p1 if winner == self.p2 else self.p2
-            loser.receive_card(self.deck.draw())
-
-        self.status_label.config(
-            text=f"{winner.name} wins the trick (+{points} pts) | Briscola: {self.game.briscola_suit.value}"
-        )
-
-        self.update_hand_display()
-        self.update_score_display()
-        self.root.after(1500, self.play_phase_1)
-
-    def update_hand_display(self):
-        self.hand_rl.config(text="\n".join(f"{i+1}) {card}" for i, card in enumerate(self.player1.hand)))
-        self.hand_ai.config(text="\n".join(f"{i+1}) {card}" for i, card in enumerate(self.player2.hand)))
-
-    def update_score_display(self):
-        self.score_label_rl.config(
-            text=f"{self.player1.name} score: {self.game.scores[self.player1.name]}"
-        )
-        self.score_label_ai.config(
-            text=f"{self.player2.name} score: {self.game.scores[self.player2.name]}"
-        )
-
-    def end_game(self):
-        final_text = "=== GAME OVER ===\n"
-        for name, score in self.game.scores.items():
-            final_text += f"{name}: {score} pts\n"
-        winner = max(self.game.scores, key=self.game.scores.get)
-        final_text += f"Winner: {winner}"
-        self.play_area.config(text=final_text)
-        self.status_label.config(text="")
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,18 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
-from tkinter import Tk
-from gui.interface import BriscolaGUI
+from gui.interface import main
 
+"""
+Entry point: watch the RL agent (a rule-based player until one is trained)
+play the trained model in the GUI. Options as in gui/interface.py, e.g.
 
-# 1. Inizializza e carica il modello
-model = SimpleMLP()
-model.load_state_dict(torch.load("ai/models/trainer_model.pt"))
-model.eval()
+    python main.py --a rule --b model:trainer@numpy
 
-# 2. Crea il giocatore con modello
-model_player = ModelPlayer(model=model, name="Trainer_AI")
+Models are looked up in the registry (ai/registry.py) and loaded by the
+game thread on their first decision, so the window opens before torch is
+imported.
+"""
 
+if __name__ == "__main__":
+    main()
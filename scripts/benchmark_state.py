@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import copy
+import time
+import random
+
+from game.briscola import BriscolaGame
+from game.player import Player
+from game import state as compact
+
+"""
+Nodes/sec of the ways a search can expand a position of a BriscolaGame:
+copy.deepcopy of the game, apply_move/undo_move, snapshot/restore and the
+compact tuple state of game/state.py.
+"""
+
+def positions(n_games=20, seed=0):
+    """Games frozen at random points, with one legal move to expand."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n_games):
+        game = BriscolaGame(Player("A"), Player("B"), rng=random.Random(rng.getrandbits(32)))
+        for _ in range(rng.randrange(39)):
+            game.apply_move(rng.choice(game.legal_moves()))
+        out.append((game, rng.choice(game.legal_moves())))
+    return out
+
+def bench(label, expand, positions, n_nodes):
+    start = time.perf_counter()
+    for i in range(n_nodes):
+        expand(*positions[i % len(positions)])
+    rate = n_nodes / (time.perf_counter() - start)
+    print(f"{label:<22} {rate:>12,.0f} nodes/sec")
+    return rate
+
+def run(n_nodes=100_000):
+    pos = positions()
+
+    def deepcopy_expand(game, move):
+        copy.deepcopy(game).apply_move(move)
+
+    def undo_expand(game, move):
+        game.apply_move(move)
+        game.undo_move()
+
+    def snapshot_expand(game, move):
+        snap = game.snapshot()
+        game.apply_move(move)
+        game.restore(snap)
+
+    states = [(g.snapshot()[0], m) for g, m in pos]
+
+    results = {
+        "deepcopy": bench("copy.deepcopy", deepcopy_expand, pos, n_nodes // 50),
+        "apply_undo": bench("apply_move/undo_move", undo_expand, pos, n_nodes),
+        "snapshot_restore": bench("snapshot/restore", snapshot_expand, pos, n_nodes),
+        "compact_state": bench("compact state", compact.apply_move, states, n_nodes),
+    }
+    print(f"apply/undo speed-up over deepcopy: {results['apply_undo'] / results['deepcopy']:.0f}x")
+    return results
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import argparse
+
+from game.briscola import BriscolaGame
+from game.rng import game_rng
+from ai.agents.model_player import ModelPlayer
+from ai.agents.rule_based import RuleBasedPlayer
+from ai.policy_cache import PolicyCache, build_opening_book, opening_observations
+from ai import registry
+
+"""
+Precompute the opening book of a model and save it as <model stem>.cache.npz,
+where ModelPlayer specs with "+cache" pick it up (ai/tournament.py). Only the
+opening positions the model plays the same way in all their symmetric
+variants are stored (ai/policy_cache.py), so the coverage printed depends on
+how symmetric the model is: a model trained on raw observations without
+augmentation gets almost none.
+
+With --games N the book is then exercised by N games against
+RuleBasedPlayer and the hit rate and decision rate are reported next to the
+same games without a cache.
+"""
+
+
+def play(model, cache, n_games, seed=0):
+    start = time.perf_counter()
+    for i in range(n_games):
+        player = ModelPlayer(model, "Model_AI", cache=cache)
+        seats = (player, RuleBasedPlayer("Rule")) if i % 2 == 0 else (RuleBasedPlayer("Rule"), player)
+        BriscolaGame(*seats, rng=game_rng(seed, i)).play_game()
+    return 20 * n_games / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening-book policy cache of a model.")
+    parser.add_argument("--model", default="trainer",
+                        help="registry name or model path; .npz uses the NumPy model, .ts.pt TorchScript")
+    parser.add_argument("--capacity", type=int, default=200_000)
+    parser.add_argument("--depth", type=int, default=1, help="decisions per game looked up (0 = all)")
+    parser.add_argument("--games", type=int, default=0, help="games to measure the hit rate on")
+    args = parser.parse_args()
+
+    model = registry.load(args.model)
+    start = time.perf_counter()
+    keys = opening_observations()
+    cache = build_opening_book(ModelPlayer(model).evaluate, PolicyCache(args.capacity, depth=args.depth or None), keys)
+    out = os.path.splitext(registry.resolve(args.model)[1])[0] + ".cache.npz"
+    cache.save(out)
+    print(f"{len(cache):,} of {len(keys):,} opening positions played the same in every variant "
+          f"({time.perf_counter() - start:.1f}s) → {out}")
+
+    if args.games:
+        uncached = play(model, None, args.games)
+        cached = play(model, cache, args.games)
+        stats = cache.stats()
+        print(f"Hit rate {stats['hit_rate']:.1%} ({stats['hits']:,} / {stats['hits'] + stats['misses']:,})")
+        print(f"Decisions/sec: {uncached:,.0f} without cache, {cached:,.0f} with cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import argparse
+import numpy as np
+
+from ai.canonical import canonicalize_rows
+from ai.dataset import ShardDataset, MANIFEST
+
+"""
+Dataset post-processing: canonicalize and deduplicate.
+
+Every row (shards of scripts/generate_dataset.py or the legacy CSV) is
+mapped to its canonical form (ai/canonical.py: trump suit 0, non-trump
+suits in signature order, sorted hands, action following its card), then a
+hash index keyed by the row bytes keeps one copy of each canonical row with
+the number of source rows it replaces. The output is a regular shard
+directory whose manifest has "canonical": true and a weights .npy (int32
+counts) per shard; ShardLoader yields the weights with every batch and
+scripts/train_model.py weights the loss by them.
+
+Train on it with augmentation (the default for canonical data in
+train_model.py): the model then still sees every suit labelling and hand
+order, not only the canonical ones.
+"""
+
+
+def read_rows(src):
+    """All rows of a shard directory or a CSV file as one int8 array, plus the column names."""
+    if os.path.isdir(src):
+        dataset = ShardDataset(src)
+        return np.concatenate(dataset.shards), dataset.columns
+    with open(src) as f:
+        columns = f.readline().strip().split(",")
+    return np.loadtxt(src, delimiter=",", skiprows=1, dtype=np.int8, ndmin=2), columns
+
+
+def dedup_rows(rows, history_len=3):
+    """Canonical unique rows (first-seen order) and how many input rows each one stands for."""
+    canonical = canonicalize_rows(rows, history_len)
+    index = {}  # row bytes → position in the output
+    counts = []
+    keep = []
+    for i, row in enumerate(canonical):
+        key = row.tobytes()
+        j = index.get(key)
+        if j is None:
+            index[key] = len(keep)
+            keep.append(i)
+            counts.append(1)
+        else:
+            counts[j] += 1
+    return canonical[keep], np.array(counts, dtype=np.int32)
+
+
+def dedup_dataset(src="data/shards", out_dir="data/shards_dedup", rows_per_shard=1 << 20):
+    rows, columns = read_rows(src)
+    history_len = (len(columns) - 1) // 9
+    unique, counts = dedup_rows(rows, history_len)
+
+    os.makedirs(out_dir, exist_ok=True)
+    shards = []
+    for index, start in enumerate(range(0, len(unique), rows_per_shard)):
+        end = min(start + rows_per_shard, len(unique))
+        name = f"shard_{index:05d}"
+        np.save(os.path.join(out_dir, name + ".npy"), unique[start:end])
+        np.save(os.path.join(out_dir, name + ".weights.npy"), counts[start:end])
+        shards.append({"file": name + ".npy", "weights": name + ".weights.npy", "rows": end - start,
+                       "weight": int(counts[start:end].sum())})
+
+    manifest = {
+        "format": "briscola-sequential",
+        "version": 1,
+        "dtype": "int8",
+        "columns": columns,
+        "sequence_len": history_len,
+        "canonical": True,
+        "source": src,
+        "source_rows": int(len(rows)),
+        "rows": int(len(unique)),
+        "shards": shards,
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Canonicalize and deduplicate the sequential dataset.")
+    parser.add_argument("--src", default="data/shards", help="shard directory or CSV file")
+    parser.add_argument("--out", default="data/shards_dedup")
+    parser.add_argument("--rows-per-shard", type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    manifest = dedup_dataset(args.src, args.out, args.rows_per_shard)
+    print(f"{manifest['source_rows']} rows → {manifest['rows']} canonical rows "
+          f"({manifest['rows'] / max(manifest['source_rows'], 1):.1%}) saved to {args.out}")
@@ -2,51 +2,53 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import torch
-from ai.models.network import CNNBriscolaModel
-from ai.agents.model_player import ModelPlayer
-from ai.agents.rule_based import RuleBasedPlayer
-from game.briscola import BriscolaGame
-
-def evaluate(n_games=100):
-    model = CNNBriscolaModel()
-    model.load_state_dict(torch.load("ai/models/trainer_model.pt"))
-    model.eval()
-
-    model_wins = 0
-    rule_wins = 0
-    draws = 0
-    total_model_score = 0
-    total_rule_score = 0
-
-    for i in range(n_games):
-        model_player = ModelPlayer(model=model, name="Model_AI")
-        rule_player = RuleBasedPlayer("Rule_Based")
-        game = BriscolaGame(model_player, rule_player)
-        game.play_game()
-
-        score_model = game.scores["Model_AI"]
-        score_rule = game.scores["Rule_Based"]
-
-        total_model_score += score_model
-        total_rule_score += score_rule
-
-        if score_model > score_rule:
-            model_wins += 1
-        elif score_model < score_rule:
-            rule_wins += 1
-        else:
-            draws += 1
-
-        print(f"Game {i+1}: Model_AI {score_model} vs Rule_Based {score_rule}")
+import argparse
+from ai.tournament import run_tournament, print_report
+
+
+def evaluate(n_games=100, verbose=False, workers=None, seed=0, agents=None, ledger=None):
+    """
+    Plays n_games per pairing (n_games / 2 deals, each from both seats) across a
+    process pool. With no agents given, Model_AI is evaluated against Rule_Based.
+    With a ledger path the games are also recorded in that rating ledger
+    (ai/ratings.py), which registers unknown agents.
+    """
+    if agents is None:
+        agents = {"Model_AI": "model:trainer", "Rule_Based": "rule"}
+
+    summaries, rows = run_tournament(agents, n_deals=max(1, n_games // 2), base_seed=seed, workers=workers)
+
+    if verbose:
+        for (a, b), pair_rows in rows.items():
+            for i, (deal, seat_a, score_a, score_b) in enumerate(pair_rows):
+                print(f"Game {i+1} (deal {deal}, {a} seat {seat_a}): {a} {score_a} vs {b} {score_b}")
 
     print("\n=== Evaluation Summary ===")
-    print(f"Total games: {n_games}")
-    print(f"Model_AI wins: {model_wins} ({model_wins / n_games:.2%})")
-    print(f"Rule_Based wins: {rule_wins} ({rule_wins / n_games:.2%})")
-    print(f"Draws: {draws}")
-    print(f"Average score - Model_AI: {total_model_score / n_games:.2f}")
-    print(f"Average score - Rule_Based: {total_rule_score / n_games:.2f}")
+    print_report(summaries)
+
+    if ledger:
+        from ai.ratings import RatingLedger
+        with RatingLedger(ledger) as book:
+            for name, spec in agents.items():
+                book.add_agent(name, spec)
+            for (a, b), pair_rows in rows.items():
+                book.record(a, b, pair_rows, base_seed=seed)
+            print("\n=== Ratings (mu - 3 sigma) ===")
+            for r in book.leaderboard():
+                print(f"{r['name']}: {r['mu'] - 3 * r['sigma']:.2f} (mu {r['mu']:.2f}, sigma {r['sigma']:.2f}, elo {r['elo']:.0f})")
+    return summaries
 
 if __name__ == "__main__":
-    evaluate(n_games=100)
+    parser = argparse.ArgumentParser(description="Evaluate Briscola agents in a round-robin tournament.")
+    parser.add_argument("--games", type=int, default=100, help="games per pairing")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed: deal i is game_rng(seed, i)")
+    parser.add_argument("--agent", action="append", metavar="NAME=SPEC",
+                        help='agent to include, e.g. "Rule_Based=rule" or "Ckpt=model:path.pt" or "Fast=model:trainer@numpy" (repeatable)')
+    parser.add_argument("--ledger", default=None, help="also record the games in this rating ledger (.sqlite)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    agents = dict(a.split("=", 1) for a in args.agent) if args.agent else None
+    evaluate(n_games=args.games, verbose=args.verbose, workers=args.workers, seed=args.seed, agents=agents,
+             ledger=args.ledger)
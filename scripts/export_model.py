@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ai.models.network import CNNBriscolaModel
+from ai import registry
+from ai.models.numpy_model import NumpyCNNBriscolaModel, quantize_params
+
+"""
+Export a trained CNNBriscolaModel for fast inference.
+
+From ai/models/trainer_model.pt this writes, next to it:
+    trainer_model.ts.pt   TorchScript (torch.jit.load, no Python model code)
+    trainer_model.onnx    ONNX, dynamic batch axis (needs onnx and onnxscript)
+    trainer_model.npz     float32 weights for NumpyCNNBriscolaModel (no torch at all)
+
+With --quantize the TorchScript model gets int8 dynamic quantization (only
+the Linear layer: torch has no dynamic int8 Conv1d) and the .npz stores
+int8 weights with per-channel scales. Every artifact is checked against the
+eager model on random observations and timed on single-state calls.
+"""
+
+MODEL_PATH = "ai/models/trainer_model.pt"
+INPUT_LEN = 27
+
+
+def load_eager(path=MODEL_PATH):
+    model = CNNBriscolaModel(**registry.model_kwargs(path))
+    model.load_state_dict(torch.load(path))
+    model.eval()
+    return model
+
+
+def export_torchscript(model, path, quantize=False):
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    scripted = torch.jit.trace(model, torch.zeros(1, INPUT_LEN))
+    scripted.save(path)
+    return path
+
+
+def export_onnx(model, path):
+    """Returns the path, or None if the ONNX exporter's dependencies are not installed."""
+    try:
+        torch.onnx.export(model, (torch.zeros(1, INPUT_LEN),), path, input_names=["obs"],
+                          output_names=["logits"], dynamic_axes={"obs": {0: "batch"}, "logits": {0: "batch"}})
+    except (ImportError, ModuleNotFoundError) as e:
+        print(f"Skipping ONNX export ({e}); pip install onnx onnxscript to enable it.")
+        return None
+    return path
+
+
+def export_numpy(model, path, quantize=False):
+    params = {k: v.detach().numpy() for k, v in model.state_dict().items()}
+    np.savez(path, **(quantize_params(params) if quantize else params))
+    return path
+
+
+def _time_calls(fn, x, n=2000):
+    fn(x)
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(x)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def verify(model, artifacts, n_states=4096, seed=0):
+    """Compare every artifact with the eager model: max |Δlogit|, argmax agreement, µs per single-state call."""
+    rng = np.random.default_rng(seed)
+    # Observation-like inputs: small non-negative integers (card values and suit indices)
+    x = rng.integers(0, 11, size=(n_states, INPUT_LEN)).astype(np.float32)
+    with torch.no_grad():
+        reference = model(torch.from_numpy(x)).numpy()
+
+    runners = {"eager": lambda a: model(torch.from_numpy(a)).numpy()}
+    if "torchscript" in artifacts:
+        ts = torch.jit.load(artifacts["torchscript"])
+        runners["torchscript"] = lambda a: ts(torch.from_numpy(a)).numpy()
+    if "onnx" in artifacts:
+        try:
+            import onnxruntime
+            session = onnxruntime.InferenceSession(artifacts["onnx"])
+            runners["onnx"] = lambda a: session.run(None, {"obs": a})[0]
+        except ImportError:
+            print("onnxruntime not installed: ONNX artifact not verified.")
+    if "numpy" in artifacts:
+        runners["numpy"] = NumpyCNNBriscolaModel.load(artifacts["numpy"])
+
+    print(f"{'backend':<12} {'max |Δ|':>10} {'argmax agree':>13} {'µs/call':>9}")
+    with torch.no_grad():
+        for name, run in runners.items():
+            out = run(x)
+            diff = float(np.abs(out - reference).max())
+            agree = float((out.argmax(1) == reference.argmax(1)).mean())
+            print(f"{name:<12} {diff:>10.2e} {agree:>13.2%} {_time_calls(run, x[:1]):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export CNNBriscolaModel to TorchScript, ONNX and NumPy.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--formats", default="torchscript,onnx,numpy",
+                        help="comma separated subset of torchscript,onnx,numpy")
+    parser.add_argument("--quantize", action="store_true", help="int8 weights (TorchScript and NumPy)")
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    model = load_eager(args.model)
+    stem = os.path.splitext(args.model)[0] + (".int8" if args.quantize else "")
+    formats = args.formats.split(",")
+    artifacts = {}
+    if "torchscript" in formats:
+        artifacts["torchscript"] = export_torchscript(model, stem + ".ts.pt", args.quantize)
+    if "onnx" in formats:
+        path = export_onnx(model, stem + ".onnx")
+        if path:
+            artifacts["onnx"] = path
+    if "numpy" in formats:
+        artifacts["numpy"] = export_numpy(model, stem + ".npz", args.quantize)
+    for kind, path in artifacts.items():
+        print(f"{kind}: {path} ({os.path.getsize(path):,} bytes)")
+
+    if not args.no_verify:
+        verify(model, artifacts)
+
+
+if __name__ == "__main__":
+    main()
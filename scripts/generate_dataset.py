@@ -1,12 +1,17 @@
 import sys
 import os
 import csv
+import json
+import argparse
+from multiprocessing import Pool
+import numpy as np
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from game.briscola import BriscolaGame
+from game.rng import game_rng
 from ai.agents.rule_based import RuleBasedPlayer
-from game.cards import Suit
+from ai.observation import ObservationBuffer
 
 """
 =====================
@@ -75,69 +80,134 @@ The goal is to help the model go beyond reactive behavior
 by understanding short-term strategies and card dynamics over time.
 """
 
-# Helper: encode a single game state
-
-def encode_card(card):
-    """Restituisce [valore, seme] oppure [0, 0] se la carta è None"""
-    return [card.value, list(Suit).index(card.suit)] if card else [0, 0]
-
-def encode_state(hand, briscola, opponent_card):
-    state = []
-    for card in hand:
-        state += encode_card(card)
-    while len(state) < 6:  # 3 carte x [valore, seme]
-        state += [0, 0]
-    state += [list(Suit).index(briscola)]  # Briscola come intero
-    state += encode_card(opponent_card)    # Carta avversaria (valore, seme)
-    return state
-
-
-
-# Helper: flatten list of lists
-def flatten(sequences):
-    return [val for seq in sequences for val in seq]
+def make_header(sequence_len=3):
+    # Header: s0_v1, ..., s2_opp, action
+    header = []
+    for t in range(sequence_len):  # per s0, s1, s2
+        header += [
+            f"s{t}_v1", f"s{t}_s1", f"s{t}_v2", f"s{t}_s2", f"s{t}_v3", f"s{t}_s3", f"s{t}_briscola", f"s{t}_opp_v", f"s{t}_opp_s"
+        ]
+    header += ["action"]
+    return header
+
+def game_rows(sequence_len=3, rng=None):
+    """Play one game between two RuleBasedPlayers (dealt with rng, see game/rng.py) and yield its dataset rows."""
+    p1 = RuleBasedPlayer("Trainer")
+    p2 = RuleBasedPlayer("Opponent")
+    game = BriscolaGame(p1, p2, rng=rng)
+
+    memory = {p.name: ObservationBuffer(sequence_len, dtype=np.int8) for p in game.players}
+
+    while p1.has_cards():
+        for i, player in enumerate(game.players):
+            opponent = game.players[1 - i]
+            opp_card = getattr(opponent, "last_card_played", None)
+
+            history = memory[player.name]
+            history.push(player.hand, game.briscola_index, opp_card)
+
+            if history.pushes >= sequence_len:
+                played_card = player.play_card()
+                try:
+                    action_index = player.original_hand.index(played_card)
+                except:
+                    action_index = 0
+
+                yield history.view().tolist() + [action_index]
+                player.last_card_played = played_card
 
 # Generate sequential dataset
-def generate_sequential_data(n_games=1000, save_path="data/dataset.csv", sequence_len=3):
+def generate_sequential_data(n_games=1000, save_path="data/dataset.csv", sequence_len=3, base_seed=None):
+    # base_seed=None deals with the global random generator (the legacy behaviour)
     with open(save_path, "w", newline="") as f:
         writer = csv.writer(f)
+        writer.writerow(make_header(sequence_len))
 
-        # Header: s0_v1, ..., s2_opp, action
-        header = []
-        for t in range(sequence_len):  # per s0, s1, s2
-            header += [
-                f"s{t}_v1", f"s{t}_s1", f"s{t}_v2", f"s{t}_s2", f"s{t}_v3", f"s{t}_s3", f"s{t}_briscola", f"s{t}_opp_v", f"s{t}_opp_s"
-            ]
-        header += ["action"]
-
-        writer.writerow(header)
-
-        for _ in range(n_games):
-            p1 = RuleBasedPlayer("Trainer")
-            p2 = RuleBasedPlayer("Opponent")
-            game = BriscolaGame(p1, p2)
+        for i in range(n_games):
+            rng = None if base_seed is None else game_rng(base_seed, i)
+            writer.writerows(game_rows(sequence_len, rng))
 
-            memory = {p.name: [] for p in game.players}
-
-            while p1.has_cards():
-                for i, player in enumerate(game.players):
-                    opponent = game.players[1 - i]
-                    opp_card = getattr(opponent, "last_card_played", None)
-
-                    current_state = encode_state(player.hand, game.briscola_suit, opp_card)
-                    memory[player.name].append(current_state)
+"""
+=====================
+Binary shards
+=====================
 
-                    if len(memory[player.name]) >= sequence_len:
-                        sequence = memory[player.name][-sequence_len:]
-                        played_card = player.play_card()
-                        try:
-                            action_index = player.original_hand.index(played_card)
-                        except:
-                            action_index = 0
+generate_dataset_shards() splits the games into shards played by worker
+processes. Game i is dealt by game_rng(base_seed, i) (game/rng.py), so the
+output does not depend on the number of workers and any game can be
+regenerated from its index. Each shard is a (rows, 28) int8
+.npy file (memory-mappable with np.load(..., mmap_mode="r")) and
+manifest.json records the schema, the seed range and the row count of every
+shard.
+"""
 
-                        writer.writerow(flatten(sequence) + [action_index])
-                        player.last_card_played = played_card
+MANIFEST = "manifest.json"
+
+def _generate_shard(args):
+    index, first_game, n_games, base_seed, sequence_len, out_dir = args
+    buf = bytearray()
+    for game_index in range(first_game, first_game + n_games):
+        for row in game_rows(sequence_len, game_rng(base_seed, game_index)):
+            buf.extend(row)  # every feature fits in a byte (values 0..10)
+    rows = np.frombuffer(bytes(buf), dtype=np.int8).reshape(-1, 9 * sequence_len + 1)
+
+    file_name = f"shard_{index:05d}.npy"
+    np.save(os.path.join(out_dir, file_name), rows)
+    return {
+        "file": file_name,
+        "rows": int(rows.shape[0]),
+        "first_game": first_game,
+        "n_games": n_games,
+    }
+
+def generate_dataset_shards(n_games=10000, out_dir="data/shards", games_per_shard=5000,
+                            workers=None, base_seed=0, sequence_len=3):
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [
+        (index, first, min(games_per_shard, n_games - first), base_seed, sequence_len, out_dir)
+        for index, first in enumerate(range(0, n_games, games_per_shard))
+    ]
+    with Pool(workers) as pool:
+        shards = list(pool.imap(_generate_shard, tasks))
+
+    manifest = {
+        "format": "briscola-sequential",
+        "version": 1,
+        "dtype": "int8",
+        "columns": make_header(sequence_len),
+        "sequence_len": sequence_len,
+        "base_seed": base_seed,
+        "seeding": "game_rng(base_seed, game_index)",
+        "n_games": n_games,
+        "rows": sum(s["rows"] for s in shards),
+        "shards": shards,
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def export_csv(shard_dir="data/shards", save_path="data/dataset.csv"):
+    """Write the shards of shard_dir as a single CSV with the legacy layout."""
+    with open(os.path.join(shard_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    with open(save_path, "w", newline="") as f:
+        f.write(",".join(manifest["columns"]) + "\n")
+        for shard in manifest["shards"]:
+            rows = np.load(os.path.join(shard_dir, shard["file"]), mmap_mode="r")
+            np.savetxt(f, rows, fmt="%d", delimiter=",")
 
 if __name__ == "__main__":
-    generate_sequential_data(n_games=10000)
-    print("Sequential dataset saved to data/dataset.csv")
+    parser = argparse.ArgumentParser(description="Generate the sequential Briscola dataset.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--out", default="data/shards", help="directory for the .npy shards and manifest")
+    parser.add_argument("--games-per-shard", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--csv", default=None, help="also export the shards to this CSV file")
+    args = parser.parse_args()
+
+    manifest = generate_dataset_shards(args.games, args.out, args.games_per_shard, args.workers, args.seed)
+    print(f"{manifest['rows']} rows in {len(manifest['shards'])} shards saved to {args.out}")
+    if args.csv:
+        export_csv(args.out, args.csv)
+        print(f"Sequential dataset saved to {args.csv}")
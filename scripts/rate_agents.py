@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from ai.ratings import RatingLedger, LEDGER_PATH, play_scheduled
+
+"""
+Rating ledger command line (ai/ratings.py).
+
+    python scripts/rate_agents.py add Rule_Based rule
+    python scripts/rate_agents.py add Model_AI model:trainer
+    python scripts/rate_agents.py run --games 400            # most informative pairs first
+    python scripts/rate_agents.py place Ckpt_12 model:ai/models/checkpoints/epoch_012.pt --sigma 2
+    python scripts/rate_agents.py show
+
+scripts/evaluate_model.py --ledger records its tournament games too.
+"""
+
+
+def show(ledger):
+    print(f"{'agent':<24} {'mu - 3σ':>8} {'mu':>7} {'σ':>6} {'elo':>7} {'games':>7}  spec")
+    for a in ledger.leaderboard():
+        print(f"{a['name']:<24} {a['mu'] - 3 * a['sigma']:>8.2f} {a['mu']:>7.2f} {a['sigma']:>6.2f} "
+              f"{a['elo']:>7.0f} {a['games']:>7}  {a['spec']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persistent TrueSkill/Elo ratings of Briscola agents.")
+    parser.add_argument("--ledger", default=LEDGER_PATH)
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the deals (set when the ledger is created)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="register an agent")
+    add.add_argument("name")
+    add.add_argument("spec", help='tournament spec, e.g. "rule" or "model:trainer"')
+    for name, help_text in (("run", "play the most informative pairs"), ("place", "add an agent and rate it")):
+        p = sub.add_parser(name, help=help_text)
+        if name == "place":
+            p.add_argument("name")
+            p.add_argument("spec")
+        p.add_argument("--games", type=int, default=200, help="maximum games")
+        p.add_argument("--deals-per-match", type=int, default=2, help="deals per scheduled pair (x2 seats)")
+        p.add_argument("--sigma", type=float, default=None, help="stop once sigma is at most this")
+        p.add_argument("--workers", type=int, default=None)
+    sub.add_parser("show", help="print the leaderboard")
+    sub.add_parser("rebuild", help="recompute the ratings from the recorded games")
+    args = parser.parse_args()
+
+    with RatingLedger(args.ledger, base_seed=args.seed) as ledger:
+        if args.command == "add":
+            ledger.add_agent(args.name, args.spec)
+        elif args.command in ("run", "place"):
+            focus = None
+            if args.command == "place":
+                ledger.add_agent(args.name, args.spec)
+                focus = args.name
+            play_scheduled(ledger, args.games, args.deals_per_match, args.workers, focus, args.sigma)
+        elif args.command == "rebuild":
+            ledger.rebuild()
+        show(ledger)
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import random
+import argparse
+import threading
+import multiprocessing
+from multiprocessing import Pool
+
+from game.briscola import BriscolaGame
+from game.events import ConsoleSink, MultiSink, QueueSink
+from game.rng import game_seed
+from game.records import GameRecordWriter, GameRecordReader, RecordingSink, replay
+from ai.tournament import make_player, _init_worker
+
+"""
+Record games between two agents into a game record file (game/records.py).
+
+    python scripts/record_games.py --games 100000 --a rule --b numpy:ai/models/trainer_model.npz
+    python scripts/record_games.py --show 42     # replay game 42 of the file on the console
+    python scripts/record_games.py --games 100000 --watch 5000   # watch game 5000 in the GUI while recording
+
+Game i is dealt by random.Random(game_seed(seed, i)) and the agents swap
+seats every game; the tag of a record is "<spec seat 0>|<spec seat 1>".
+Workers play shards of games and the main process appends their records in
+game order, so the file does not depend on the number of workers. Running
+the script again on an existing file appends to it.
+
+With --watch the worker that plays the watched game also sends its events
+to the GUI (gui/interface.py) without blocking: if the GUI falls behind,
+events are dropped, never the batch slowed down.
+"""
+
+RECORDS_PATH = "data/games.bgr"
+_watch = None  # (game id, event queue) when a game is watched
+
+
+def _init_recorder(threads, watch):
+    global _watch
+    _init_worker(threads)
+    _watch = watch
+
+
+def _play_shard(args):
+    spec_a, spec_b, base_seed, games = args
+    records = []
+    for g in games:
+        seed = game_seed(base_seed, g)
+        specs = (spec_a, spec_b) if g % 2 == 0 else (spec_b, spec_a)
+        players = [make_player(spec, f"P{seat}", game_seed(seed, seat)) for seat, spec in enumerate(specs)]
+        sink = RecordingSink(seed, "|".join(specs))
+        events = sink
+        if _watch is not None and _watch[0] == g:
+            events = MultiSink(sink, QueueSink(_watch[1], block=False))
+        game = BriscolaGame(*players, events=events, rng=random.Random(seed))
+        game.play_game()
+        records.append(sink.record)
+    return records
+
+
+def record_games(n_games, path=RECORDS_PATH, spec_a="rule", spec_b="rule", base_seed=0, first_game=0,
+                 workers=None, shard_size=200, watch=None):
+    """watch: (game id, queue) to stream the events of one game to."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    shards = [(spec_a, spec_b, base_seed, range(i, min(i + shard_size, first_game + n_games)))
+              for i in range(first_game, first_game + n_games, shard_size)]
+    start = time.perf_counter()
+    with GameRecordWriter(path) as writer:
+        if workers == 1:
+            _init_recorder(1, watch)
+            results = map(_play_shard, shards)
+            for records in results:
+                for record in records:
+                    writer.write(record)
+        else:
+            with Pool(workers, initializer=_init_recorder, initargs=(1, watch)) as pool:
+                for records in pool.imap(_play_shard, shards):
+                    for record in records:
+                        writer.write(record)
+    elapsed = time.perf_counter() - start
+    print(f"{n_games} games recorded to {path} in {elapsed:.1f}s ({n_games / elapsed:,.0f} games/s, "
+          f"{os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record games into a game record file, or replay one.")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--a", default="rule", help="agent spec (see ai/tournament.py)")
+    parser.add_argument("--b", default="rule", help="agent spec (see ai/tournament.py)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed: game i is dealt from game_seed(seed, i)")
+    parser.add_argument("--first-game", type=int, default=0, help="id of the first game (to extend a file)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=RECORDS_PATH)
+    parser.add_argument("--show", type=int, default=None, metavar="INDEX", help="replay a recorded game instead")
+    parser.add_argument("--watch", type=int, default=None, metavar="GAME_ID", help="watch one game in the GUI")
+    args = parser.parse_args()
+
+    if args.show is not None:
+        with GameRecordReader(args.out) as reader:
+            record = reader[args.show]
+            print(f"Game {args.show} of {len(reader)} ({record.tag}), seed {record.seed}\n")
+            replay(record, events=ConsoleSink())
+    elif args.watch is not None:
+        # Tk needs the main thread: the batch runs in a background thread, the GUI here
+        import tkinter as tk
+        from gui.interface import BriscolaGUI, WatchSource
+        q = multiprocessing.Queue(maxsize=10_000)
+        threading.Thread(target=record_games, daemon=True,
+                         args=(args.games, args.out, args.a, args.b, args.seed, args.first_game, args.workers),
+                         kwargs={"watch": (args.watch, q)}).start()
+        root = tk.Tk()
+        BriscolaGUI(root, WatchSource(q))
+        root.mainloop()
+    else:
+        record_games(args.games, args.out, args.a, args.b, args.seed, args.first_game, args.workers)
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import csv
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+"""
+Data-parallel scaling report for scripts/train_model.py.
+
+    python scripts/scaling_report.py --data data/shards --procs 1 2 4 8 --epochs 3
+
+For every process count the script launches train_model.py under torchrun
+(python -m torch.distributed.run --standalone, gloo backend) with the same
+per-rank batch size and one torch thread per rank by default, then reads the
+aggregate samples/s of the last epoch from the rank-0 log (the first epoch
+includes warm-up). It prints speedup and parallel efficiency against one
+process and marks where scaling stops: the first process count whose
+efficiency falls below --min-efficiency or that is slower than the previous
+one. With --out the results are also written as JSON.
+"""
+
+TRAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "train_model.py")
+
+
+def measure(n_procs, data, epochs, batch_size, threads, workdir):
+    """Aggregate samples/s of the last epoch of a torchrun run with n_procs ranks."""
+    run_dir = os.path.join(workdir, f"np{n_procs}")
+    os.makedirs(run_dir, exist_ok=True)
+    log = os.path.join(run_dir, "log.csv")
+    # Passed as a config file: torchrun would take "--log" for an abbreviation of its own "--log-dir"
+    config = os.path.join(run_dir, "config.json")
+    with open(config, "w") as f:
+        json.dump({"data": data, "epochs": epochs, "batch_size": batch_size, "threads": threads, "log": log,
+                   "output": os.path.join(run_dir, "model.pt"), "checkpoint_dir": run_dir,
+                   "checkpoint_every": 10 ** 9}, f)
+    cmd = [sys.executable, "-m", "torch.distributed.run", "--standalone", f"--nproc-per-node={n_procs}",
+           TRAIN_SCRIPT, "--config", config]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    with open(log) as f:
+        rows = list(csv.DictReader(f))
+    return {"procs": n_procs, "samples_per_sec": float(rows[-1]["SamplesPerSec"]), "loss": float(rows[-1]["Loss"]),
+            "wall_sec": wall}
+
+
+def report(results, min_efficiency=0.7):
+    base = results[0]["samples_per_sec"] / results[0]["procs"]
+    stop = None
+    previous = 0.0
+    print(f"\n{'procs':>6} {'samples/s':>12} {'speedup':>8} {'efficiency':>10} {'final loss':>10} {'wall s':>8}")
+    for r in results:
+        r["speedup"] = r["samples_per_sec"] / base
+        r["efficiency"] = r["speedup"] / r["procs"]
+        flag = ""
+        if stop is None and r["procs"] > results[0]["procs"] and (
+                r["efficiency"] < min_efficiency or r["samples_per_sec"] <= previous):
+            stop = r["procs"]
+            flag = "  <- scaling stops"
+        previous = r["samples_per_sec"]
+        print(f"{r['procs']:>6} {r['samples_per_sec']:>12,.0f} {r['speedup']:>7.2f}x {r['efficiency']:>9.0%} "
+              f"{r['loss']:>10.4f} {r['wall_sec']:>8.1f}{flag}")
+    if stop is None:
+        print(f"\nScaling holds up to {results[-1]['procs']} processes (efficiency >= {min_efficiency:.0%}).")
+    return stop
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Samples/s of data-parallel training against the number of processes.")
+    parser.add_argument("--data", default="data/shards")
+    parser.add_argument("--procs", type=int, nargs="+", default=None, help="process counts (default: 1, 2, 4, ... cores)")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=1024, help="per-rank batch size")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per rank")
+    parser.add_argument("--min-efficiency", type=float, default=0.7)
+    parser.add_argument("--out", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    procs = args.procs
+    if procs is None:
+        procs, n = [], 1
+        while n <= (os.cpu_count() or 1):
+            procs.append(n)
+            n *= 2
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in procs:
+            results.append(measure(n, args.data, args.epochs, args.batch_size, args.threads, workdir))
+            print(f"{n} process(es): {results[-1]['samples_per_sec']:,.0f} samples/s")
+    stop = report(results, args.min_efficiency)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "batch_size": args.batch_size, "threads": args.threads,
+                       "scaling_stops_at": stop, "results": results}, f, indent=2)
@@ -0,0 +1,274 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import io
+import json
+import math
+import time
+import random
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from game.rng import game_rng, game_seed
+from ai import registry
+
+"""
+Hyperparameter sweep for CNNBriscolaModel with asynchronous successive
+halving (ASHA).
+
+    python scripts/sweep.py --dir data/sweeps/cnn --trials 27 --workers 4
+    python scripts/sweep.py --dir data/sweeps/cnn          # resume an interrupted sweep
+
+Every trial is a train_model.py run with sampled settings (SEARCH_SPACE:
+channel widths, kernel size, Adam lr, StepLR step and gamma, batch size;
+input_len is fixed by the dataset). Trials run on a process pool, each with
+--threads-per-trial torch threads. Training goes up a ladder of rungs,
+min_epochs * eta^k epochs; after each rung a trial is scored on
+validation data and on its win rate against RuleBasedPlayer over a short
+tournament (the same deals for every trial, dealt from EVAL_SEED rather than
+the base seed 0 of the default training data). A trial is promoted to the
+next rung when it is in the top 1/eta of the trials that finished its rung,
+ranked by the mean of its validation-loss rank and its win-rate rank. Free
+workers take a promotion when there is one and start a new trial otherwise,
+so no worker waits for a rung to fill.
+
+Everything lives in the sweep directory: sweep.json (settings), trials.jsonl
+(one line per finished rung), and trial_XXX/ with the train_model.py
+checkpoints and model.pt, next to a model.json with the sampled architecture,
+so best.json's model loads through ai/registry.py (model:<path> specs). The
+settings of trial i are sampled from a seed derived from (seed, i), and a
+promoted trial resumes from its checkpoint, so rerunning the same command
+after an interruption loses at most the rungs that were in progress.
+"""
+
+SEARCH_SPACE = {
+    "model.channels": {"choice": [[8, 16], [16, 32], [32, 64]]},
+    "model.kernel_size": {"choice": [3, 5]},
+    "optimizer.lr": {"loguniform": [1e-3, 3e-2]},
+    "schedule.step_size": {"choice": [3, 5, 10]},
+    "schedule.gamma": {"choice": [0.1, 0.3, 0.5]},
+    "batch_size": {"choice": [512, 1024, 4096]},
+}
+SETTINGS = "sweep.json"
+RESULTS = "trials.jsonl"
+VAL_SEED = 1_000_003  # base seed of the generated validation games, distinct from the training data's
+EVAL_SEED = 2_000_003  # base seed of the win-rate deals, distinct from both
+
+
+def sample_params(space, seed, trial):
+    rng = random.Random(game_seed(seed, trial))
+    params = {}
+    for key, dist in space.items():
+        if "choice" in dist:
+            params[key] = rng.choice(dist["choice"])
+        elif "loguniform" in dist:
+            low, high = dist["loguniform"]
+            params[key] = math.exp(rng.uniform(math.log(low), math.log(high)))
+        elif "uniform" in dist:
+            params[key] = rng.uniform(*dist["uniform"])
+        else:
+            raise ValueError(f"Unknown distribution for {key}: {dist}")
+    return params
+
+
+def apply_params(config, params):
+    """Set dotted keys ("optimizer.lr") of a train_model.py config."""
+    config = json.loads(json.dumps(config))
+    for key, value in params.items():
+        *path, last = key.split(".")
+        node = config
+        for part in path:
+            node = node[part]
+        node[last] = value
+    return config
+
+
+def rungs(min_epochs, max_epochs, eta):
+    ladder = [min_epochs]
+    while ladder[-1] * eta <= max_epochs:
+        ladder.append(ladder[-1] * eta)
+    return ladder
+
+
+def win_rate(net, n_deals, base_seed):
+    """Share of points-won games (draws count half) of ModelPlayer(net) against RuleBasedPlayer, both seats."""
+    from game.briscola import BriscolaGame
+    from ai.agents.model_player import ModelPlayer
+    from ai.agents.rule_based import RuleBasedPlayer
+    score = 0.0
+    for deal in range(n_deals):
+        for seat in (0, 1):
+            players = [ModelPlayer(net, "Model"), RuleBasedPlayer("Rule")]
+            game = BriscolaGame(*(players if seat == 0 else players[::-1]), rng=game_rng(base_seed, deal))
+            game.play_game()
+            margin = game.scores["Model"] - game.scores["Rule"]
+            score += 1.0 if margin > 0 else 0.5 if margin == 0 else 0.0
+    return score / max(2 * n_deals, 1)
+
+
+def run_trial(task):
+    """Train one trial up to `epochs` (resuming its checkpoint) and score it; runs in a worker process."""
+    import torch
+    from scripts.train_model import train, validate, make_loader, latest_checkpoint
+    base_config, params, trial_dir, epochs, threads, val_data, eval_deals, eval_seed = task
+    torch.set_num_threads(threads)
+    config = apply_params(base_config, params)
+    config.update(
+        epochs=epochs, threads=threads, checkpoint_dir=trial_dir, checkpoint_every=10 ** 9, plot=None,
+        output=os.path.join(trial_dir, "model.pt"), log=os.path.join(trial_dir, "training_log.csv"),
+    )
+    os.makedirs(trial_dir, exist_ok=True)
+    start = time.perf_counter()
+    # The checkpoint of this rung when it was already trained (its result lost), else the latest one
+    resume = os.path.join(trial_dir, f"epoch_{epochs:03d}.pt")
+    if not os.path.exists(resume):
+        resume = latest_checkpoint(trial_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        net, history = train(config, resume=resume)
+    net.eval()
+    val_loss, val_acc = validate(net, make_loader({**config, "data": val_data, "augment": False}),
+                                 torch.nn.CrossEntropyLoss(reduction="none"))
+    return {
+        "epochs": epochs, "train_loss": history[-1][0] if history else None, "val_loss": val_loss,
+        "val_acc": val_acc, "win_rate": win_rate(net, eval_deals, eval_seed),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def rank(rows):
+    """Trial ids ordered best first by the mean of their validation-loss and win-rate ranks."""
+    # Ties share a rank (number of strictly better trials): short tournaments often tie on win rate
+    losses = [r["val_loss"] for r in rows]
+    wins = [r["win_rate"] for r in rows]
+    score = {r["trial"]: (sum(l < r["val_loss"] for l in losses) + sum(w > r["win_rate"] for w in wins),
+                          r["val_loss"]) for r in rows}
+    return sorted(score, key=score.get)
+
+
+def read_results(sweep_dir):
+    path = os.path.join(sweep_dir, RESULTS)
+    results = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    results[(row["trial"], row["rung"])] = row
+    return results
+
+
+def run_sweep(sweep_dir, base_config=None, n_trials=27, min_epochs=1, max_epochs=27, eta=3, eval_deals=50,
+              val_data=None, space=None, seed=0, workers=None, threads_per_trial=1, log=print):
+    from scripts.train_model import DEFAULT_CONFIG
+    os.makedirs(sweep_dir, exist_ok=True)
+    settings_path = os.path.join(sweep_dir, SETTINGS)
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            settings = json.load(f)
+        log(f"Resuming the sweep in {sweep_dir}")
+    else:
+        settings = {
+            "base_config": base_config or DEFAULT_CONFIG, "n_trials": n_trials, "min_epochs": min_epochs,
+            "max_epochs": max_epochs, "eta": eta, "eval_deals": eval_deals, "val_data": val_data,
+            "space": space or SEARCH_SPACE, "seed": seed, "eval_seed": EVAL_SEED,
+        }
+        with open(settings_path, "w") as f:
+            json.dump(settings, f, indent=2)
+
+    s = settings
+    val_data = s["val_data"] or os.path.join(sweep_dir, "val")
+    if not os.path.exists(os.path.join(val_data, "manifest.json")):
+        from scripts.generate_dataset import generate_dataset_shards
+        log(f"Generating validation data in {val_data}")
+        generate_dataset_shards(1000, val_data, base_seed=VAL_SEED, workers=workers)
+    ladder = rungs(s["min_epochs"], s["max_epochs"], s["eta"])
+    results = read_results(sweep_dir)
+    workers = workers or os.cpu_count()
+
+    def task(trial, rung):
+        params = sample_params(s["space"], s["seed"], trial)
+        return (s["base_config"], params, os.path.join(sweep_dir, f"trial_{trial:03d}"), ladder[rung],
+                threads_per_trial, val_data, s["eval_deals"], s.get("eval_seed", s["seed"]))
+
+    def next_job(busy):
+        # Promotions first, from the highest rung down
+        for rung in reversed(range(len(ladder) - 1)):
+            done = [row for (t, r), row in results.items() if r == rung]
+            for trial in rank(done)[:len(done) // s["eta"]]:
+                if (trial, rung + 1) not in results and trial not in busy:
+                    return trial, rung + 1
+        for trial in range(s["n_trials"]):
+            if (trial, 0) not in results and trial not in busy:
+                return trial, 0
+        return None
+
+    running = {}  # future → (trial, rung)
+    with ProcessPoolExecutor(workers) as pool, open(os.path.join(sweep_dir, RESULTS), "a") as out:
+        while True:
+            while len(running) < workers:
+                job = next_job({t for t, _ in running.values()})
+                if job is None:
+                    break
+                running[pool.submit(run_trial, task(*job))] = job
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                trial, rung = running.pop(future)
+                row = {"trial": trial, "rung": rung, **future.result(),
+                       "params": sample_params(s["space"], s["seed"], trial)}
+                results[(trial, rung)] = row
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                log(f"Trial {trial:3d} rung {rung} ({row['epochs']} epochs) | val loss {row['val_loss']:.4f} | "
+                    f"val acc {row['val_acc']:.2%} | win rate {row['win_rate']:.1%} | {row['seconds']:.0f}s")
+
+    return report(results, sweep_dir, log)
+
+
+def report(results, sweep_dir, log=print):
+    """Print the trials that reached the highest rung, best first; returns the best row (None if there is none)."""
+    if not results:
+        log(f"\nNo completed trials in {sweep_dir}: rerun the sweep to train them")
+        return None
+    top = max(r for _, r in results)
+    rows = {row["trial"]: row for (t, r), row in results.items() if r == top}
+    ranked = [rows[t] for t in rank(list(rows.values()))]
+    log(f"\nHighest rung {top}: {len(ranked)} trial(s), "
+        f"{len({t for t, _ in results})} trial(s) started, {len(results)} rungs trained")
+    for row in ranked:
+        params = ", ".join(f"{k}={v:.3g}" if isinstance(v, float) else f"{k}={v}" for k, v in row["params"].items())
+        log(f"  trial {row['trial']:3d} | val loss {row['val_loss']:.4f} | win rate {row['win_rate']:.1%} | {params}")
+    best = ranked[0]
+    best["model"] = os.path.join(sweep_dir, f"trial_{best['trial']:03d}", "model.pt")
+    best["model_kwargs"] = registry.model_kwargs(best["model"])
+    with open(os.path.join(sweep_dir, "best.json"), "w") as f:
+        json.dump(best, f, indent=2)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ASHA hyperparameter sweep for CNNBriscolaModel.")
+    parser.add_argument("--dir", default="data/sweeps/cnn", help="sweep directory (rerun to resume)")
+    parser.add_argument("--config", help="train_model.py JSON config the trials start from")
+    parser.add_argument("--space", help="JSON search space replacing SEARCH_SPACE")
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--min-epochs", type=int, default=1)
+    parser.add_argument("--max-epochs", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--eval-deals", type=int, default=50, help="deals (x2 seats) of the win-rate tournament")
+    parser.add_argument("--val-data", help="validation shard directory (default: generated in the sweep dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent trials (default: all cores)")
+    parser.add_argument("--threads-per-trial", type=int, default=1)
+    args = parser.parse_args()
+
+    from scripts.train_model import load_config
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    run_sweep(args.dir, load_config(args.config), args.trials, args.min_epochs, args.max_epochs, args.eta,
+              args.eval_deals, args.val_data, space, args.seed, args.workers, args.threads_per_trial)
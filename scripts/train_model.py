@@ -2,86 +2,344 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import torch
-import matplotlib.pyplot as plt
-from torch.utils.data import TensorDataset, DataLoader
-import pandas as pd
 import csv
+import json
+import time
+import random
+import argparse
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import TensorDataset, DataLoader, BatchSampler, RandomSampler
+from torch.utils.data.distributed import DistributedSampler
 from ai.models.network import CNNBriscolaModel
+from ai.dataset import ShardDataset, ShardLoader, MANIFEST
+from game import instrument
+
+"""
+Training entry point.
+
+    python scripts/train_model.py --config my_run.json --epochs 30 --batch-size 4096
+    python scripts/train_model.py --resume auto
+
+Settings come from DEFAULT_CONFIG, overridden by an optional JSON config
+file and then by command-line flags. After every `checkpoint_every` epochs a
+checkpoint with model, optimizer, scheduler and RNG state is written to
+checkpoint_dir; --resume continues from it exactly where the run stopped.
+
+Data-parallel training runs one process per rank with torch.distributed
+(gloo backend, CPU) and is enabled by the environment torchrun sets up:
+
+    torchrun --standalone --nproc-per-node 4 scripts/train_model.py --data data/shards
+    torchrun --nnodes 2 --node-rank 0 --master-addr HOST --nproc-per-node 8 scripts/train_model.py ...
+
+Every rank reads and trains on its own 1/world_size of each epoch's rows
+(ShardLoader(rank, world_size), which leaves out the last
+len(dataset) % world_size rows of the epoch order) and
+DistributedDataParallel averages the gradients, so batch_size is per rank.
+torchrun reads "--log" as its own "--log-dir": set the log path in the
+--config file instead. Only rank 0 prints, logs, writes checkpoints and
+saves the model; the logged loss and accuracy are averaged
+over the ranks and the throughput is their sum. scripts/scaling_report.py
+measures samples/s against the number of processes.
+"""
+
+DEFAULT_CONFIG = {
+    "data": "data/shards",  # shard directory (manifest.json) or a CSV file
+    "model": {"input_len": 27, "num_actions": 3},
+    "optimizer": {"lr": 1e-2, "weight_decay": 0.0},  # Adam
+    "schedule": {"step_size": 5, "gamma": 0.1},  # StepLR
+    "epochs": 30,
+    "batch_size": 1024,
+    "seed": 0,
+    "threads": None,  # torch.set_num_threads, None = torch default
+    "compile": False,  # torch.compile the model
+    "bf16": False,  # bfloat16 autocast on CPU
+    "augment": None,  # random symmetric variant of every row (shards only), None = only for canonical datasets
+    "checkpoint_dir": "ai/models/checkpoints",
+    "checkpoint_every": 1,
+    "output": "ai/models/trainer_model.pt",
+    "log": "data/training_log.csv",
+    "plot": None,  # path of a PNG with the loss/accuracy curves
+}
 
+LOG_HEADER = ["Epoch", "Loss", "Accuracy", "SamplesPerSec"]
 
-# Load dataset
-df = pd.read_csv("data/dataset.csv")
-X = df.iloc[:, :-1].values
-y = df.iloc[:, -1].values
 
-X_tensor = torch.tensor(X, dtype=torch.float32)
-y_tensor = torch.tensor(y, dtype=torch.long)
+def load_config(path=None, overrides=None):
+    config = json.loads(json.dumps(DEFAULT_CONFIG))  # deep copy
+    if path:
+        with open(path) as f:
+            for key, value in json.load(f).items():
+                if isinstance(value, dict) and isinstance(config.get(key), dict):
+                    config[key].update(value)
+                else:
+                    config[key] = value
+    for key, value in (overrides or {}).items():
+        if value is None:
+            continue
+        if key == "lr":
+            config["optimizer"]["lr"] = value
+        else:
+            config[key] = value
+    return config
 
-dataset = TensorDataset(X_tensor, y_tensor)
-loader = DataLoader(dataset, batch_size=32, shuffle=True)
 
-# Model
-model = CNNBriscolaModel()
-# Optimizer & scheduler
-optimizer = torch.optim.Adam(model.parameters(), lr=1e-2)  # LR iniziale più alto
-scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=5, gamma=0.1)
+def make_loader(config, rank=0, world_size=1):
+    """Memory-mapped shards if config["data"] is a shard directory, the legacy CSV if it is a .csv file."""
+    data = config["data"]
+    if os.path.isdir(data) and os.path.exists(os.path.join(data, MANIFEST)):
+        dataset = ShardDataset(data)
+        augment = dataset.canonical if config["augment"] is None else config["augment"]
+        return ShardLoader(dataset, batch_size=config["batch_size"], seed=config["seed"], augment=augment,
+                           rank=rank, world_size=world_size)
 
-loss_fn = torch.nn.CrossEntropyLoss()
+    if not (data.endswith(".csv") and os.path.isfile(data)):
+        raise FileNotFoundError(f"No training data at {data!r}: expected a shard directory with {MANIFEST} "
+                                f"(scripts/generate_dataset.py --out {data}) or a .csv file")
+    import pandas as pd
+    df = pd.read_csv(data)
+    dataset = TensorDataset(
+        torch.tensor(df.iloc[:, :-1].values, dtype=torch.float32),
+        torch.tensor(df.iloc[:, -1].values, dtype=torch.long),
+    )
+    # Index whole batches at once instead of collating single rows
+    if world_size > 1:
+        base = DistributedSampler(dataset, num_replicas=world_size, rank=rank, seed=config["seed"])
+    else:
+        base = RandomSampler(dataset)
+    sampler = BatchSampler(base, batch_size=config["batch_size"], drop_last=False)
+    return DataLoader(dataset, sampler=sampler, batch_size=None)
 
-# Training loop
-epochs = 30
-loss_history = []
-accuracy_history = []
 
-with open("data/training_log.csv", "w", newline="") as log_file:
-    writer = csv.writer(log_file)
-    writer.writerow(["Epoch", "Loss", "Accuracy"])
+def rng_state():
+    return {
+        "torch": torch.get_rng_state(),
+        "numpy": np.random.get_state(),
+        "python": random.getstate(),
+    }
 
-    for epoch in range(epochs):
-        total_loss = 0.0
-        correct = 0
-        total = 0
 
-        for xb, yb in loader:
-            optimizer.zero_grad()
+def set_rng_state(state):
+    torch.set_rng_state(state["torch"])
+    np.random.set_state(state["numpy"])
+    random.setstate(state["python"])
+
+
+def save_checkpoint(path, **state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    torch.save(state, tmp)
+    os.replace(tmp, path)  # never leave a half-written checkpoint behind
+
+
+def latest_checkpoint(checkpoint_dir):
+    path = os.path.join(checkpoint_dir, "latest.pt")
+    return path if os.path.exists(path) else None
+
+
+def train_one_epoch(model, loader, optimizer, loss_fn, bf16=False):
+    total_loss = 0.0
+    correct = 0
+    total = 0
+    samples = 0
+    batches = 0
+    start = time.perf_counter()
+
+    for batch in instrument.iterate("data.batch", loader):
+        xb, yb = batch[0].float(), batch[1].long()
+        wb = batch[2].float() if len(batch) > 2 else None  # row counts of a deduplicated dataset
+        optimizer.zero_grad()
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=bf16):
             preds = model(xb)
-            loss = loss_fn(preds, yb)
-            loss.backward()
-            optimizer.step()
+            losses = loss_fn(preds, yb)
+            loss = losses.mean() if wb is None else (losses * wb).sum() / wb.sum()
+        loss.backward()
+        optimizer.step()
 
-            total_loss += loss.item()
-            predicted = torch.argmax(preds, dim=1)
-            correct += (predicted == yb).sum().item()
+        total_loss += loss.item()
+        hits = torch.argmax(preds, dim=1) == yb
+        if wb is None:
+            correct += hits.sum().item()
             total += yb.size(0)
+        else:
+            correct += (hits * wb).sum().item()
+            total += wb.sum().item()
+        samples += yb.size(0)
+        if instrument.ENABLED:
+            instrument.count("train.samples", yb.size(0))
+        batches += 1
+
+    elapsed = time.perf_counter() - start
+    return total_loss / max(batches, 1), correct / max(total, 1), samples / elapsed if elapsed > 0 else 0.0
+
+
+def validate(model, loader, loss_fn):
+    """(mean loss, accuracy) over a loader without updating the model; row weights as in train_one_epoch."""
+    total_loss = 0.0
+    correct = 0.0
+    total = 0.0
+    with torch.no_grad():
+        for batch in loader:
+            xb, yb = batch[0].float(), batch[1].long()
+            wb = batch[2].float() if len(batch) > 2 else torch.ones(len(yb))
+            preds = model(xb)
+            total_loss += (loss_fn(preds, yb) * wb).sum().item()
+            correct += ((torch.argmax(preds, dim=1) == yb) * wb).sum().item()
+            total += wb.sum().item()
+    return total_loss / max(total, 1), correct / max(total, 1)
+
+
+def init_distributed():
+    """(rank, world_size), joining the torchrun process group when WORLD_SIZE > 1."""
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    if world_size == 1:
+        return 0, 1
+    if not dist.is_initialized():
+        dist.init_process_group("gloo")
+    return dist.get_rank(), world_size
+
+
+def train(config, resume=None):
+    rank, world_size = init_distributed()
+    threads = config["threads"]
+    if not threads and world_size > 1:
+        # One process per rank: split the cores instead of every rank using all of them
+        threads = max(1, (os.cpu_count() or 1) // int(os.environ.get("LOCAL_WORLD_SIZE", world_size)))
+    if threads:
+        torch.set_num_threads(threads)
+    torch.manual_seed(config["seed"])
+    np.random.seed(config["seed"])
+    random.seed(config["seed"])
+    main = rank == 0
+
+    loader = make_loader(config, rank, world_size)
+    net = CNNBriscolaModel(**config["model"])
+    optimizer = torch.optim.Adam(net.parameters(), **config["optimizer"])
+    scheduler = torch.optim.lr_scheduler.StepLR(optimizer, **config["schedule"])
+    loss_fn = torch.nn.CrossEntropyLoss(reduction="none")  # train_one_epoch applies the row weights
+
+    start_epoch = 0
+    history = []
+    if resume == "auto":
+        resume = latest_checkpoint(config["checkpoint_dir"])
+    if resume:
+        ckpt = torch.load(resume, weights_only=False)
+        net.load_state_dict(ckpt["model"])
+        optimizer.load_state_dict(ckpt["optimizer"])
+        scheduler.load_state_dict(ckpt["scheduler"])
+        set_rng_state(ckpt["rng"])
+        start_epoch = ckpt["epoch"]
+        history = ckpt["history"]
+        if main:
+            print(f"Resuming from {resume} after epoch {start_epoch}")
+
+    model = torch.compile(net) if config["compile"] else net
+    if world_size > 1:
+        # Broadcasts rank 0's weights, then averages the gradients in backward()
+        model = torch.nn.parallel.DistributedDataParallel(model)
+
+    log_mode = "a" if resume else "w"
+    log_file = open(config["log"], log_mode, newline="") if main else None
+    try:
+        writer = csv.writer(log_file) if main else None
+        if main and log_mode == "w":
+            writer.writerow(LOG_HEADER)
+
+        for epoch in range(start_epoch, config["epochs"]):
+            if isinstance(loader, ShardLoader):
+                loader.set_epoch(epoch)
+            elif world_size > 1:
+                loader.sampler.sampler.set_epoch(epoch)
+
+            avg_loss, accuracy, throughput = train_one_epoch(model, loader, optimizer, loss_fn, config["bf16"])
+            if world_size > 1:
+                stats = torch.tensor([avg_loss, accuracy, throughput], dtype=torch.float64)
+                dist.all_reduce(stats)
+                avg_loss, accuracy, throughput = stats[0].item() / world_size, stats[1].item() / world_size, stats[2].item()
+            history.append((avg_loss, accuracy))
+            scheduler.step()
+            if not main:
+                continue
+
+            writer.writerow([epoch + 1, avg_loss, accuracy, throughput])
+            log_file.flush()
+            print(f"Epoch {epoch+1} | Loss: {avg_loss:.4f} | Accuracy: {accuracy:.2%} | {throughput:,.0f} samples/s")
+
+            if (epoch + 1) % config["checkpoint_every"] == 0 or epoch + 1 == config["epochs"]:
+                state = dict(
+                    epoch=epoch + 1, model=net.state_dict(), optimizer=optimizer.state_dict(),
+                    scheduler=scheduler.state_dict(), rng=rng_state(), history=history, config=config,
+                )
+                save_checkpoint(os.path.join(config["checkpoint_dir"], f"epoch_{epoch+1:03d}.pt"), **state)
+                save_checkpoint(os.path.join(config["checkpoint_dir"], "latest.pt"), **state)
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    if main:
+        # Save model
+        torch.save(net.state_dict(), config["output"])
+        with open(os.path.splitext(config["output"])[0] + ".json", "w") as f:
+            json.dump(config["model"], f)  # architecture, read back by ai/registry.py
+        if config["plot"]:
+            plot_history(history, config["plot"])
+    if world_size > 1:
+        dist.barrier()  # the other ranks return once the model is on disk
+    return net, history
+
 
-        avg_loss = total_loss / len(loader)
-        accuracy = correct / total
+def plot_history(history, path):
+    import matplotlib
+    matplotlib.use("Agg")  # never block on a display
+    import matplotlib.pyplot as plt
 
-        loss_history.append(avg_loss)
-        accuracy_history.append(accuracy)
-        writer.writerow([epoch + 1, avg_loss, accuracy])
+    epochs = range(1, len(history) + 1)
+    fig, ax1 = plt.subplots()
 
-        print(f"Epoch {epoch+1} | Loss: {avg_loss:.4f} | Accuracy: {accuracy:.2%}")
+    ax1.set_xlabel("Epoch")
+    ax1.set_ylabel("Loss", color="blue")
+    ax1.plot(epochs, [h[0] for h in history], color="blue", label="Loss")
+    ax1.tick_params(axis="y", labelcolor="blue")
 
-        scheduler.step()
+    ax2 = ax1.twinx()
+    ax2.set_ylabel("Accuracy", color="green")
+    ax2.plot(epochs, [h[1] for h in history], color="green", label="Accuracy")
+    ax2.tick_params(axis="y", labelcolor="green")
 
-# Save model
-torch.save(model.state_dict(), "ai/models/trainer_model.pt")
+    plt.title("Training Loss & Accuracy")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
 
-# Plot
-fig, ax1 = plt.subplots()
 
-ax1.set_xlabel("Epoch")
-ax1.set_ylabel("Loss", color="blue")
-ax1.plot(range(1, epochs + 1), loss_history, color="blue", label="Loss")
-ax1.tick_params(axis="y", labelcolor="blue")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train CNNBriscolaModel.")
+    parser.add_argument("--config", help="JSON file overriding DEFAULT_CONFIG")
+    parser.add_argument("--resume", nargs="?", const="auto",
+                        help="checkpoint to resume from (default: <checkpoint_dir>/latest.pt)")
+    parser.add_argument("--data")
+    parser.add_argument("--epochs", type=int)
+    parser.add_argument("--batch-size", dest="batch_size", type=int)
+    parser.add_argument("--lr", type=float)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--compile", action="store_true", default=None)
+    parser.add_argument("--bf16", action="store_true", default=None)
+    parser.add_argument("--augment", action=argparse.BooleanOptionalAction, default=None,
+                        help="random symmetric variants of the shard rows (default: canonical datasets only)")
+    parser.add_argument("--checkpoint-dir", dest="checkpoint_dir")
+    parser.add_argument("--checkpoint-every", dest="checkpoint_every", type=int)
+    parser.add_argument("--output")
+    parser.add_argument("--log")
+    parser.add_argument("--plot", help="save loss/accuracy curves to this PNG")
+    return parser.parse_args(argv)
 
-ax2 = ax1.twinx()
-ax2.set_ylabel("Accuracy", color="green")
-ax2.plot(range(1, epochs + 1), accuracy_history, color="green", label="Accuracy")
-ax2.tick_params(axis="y", labelcolor="green")
 
-plt.title("Training Loss & Accuracy")
-fig.tight_layout()
-plt.show()
+if __name__ == "__main__":
+    args = vars(parse_args())
+    config_path = args.pop("config")
+    resume = args.pop("resume")
+    train(load_config(config_path, args), resume=resume)
+    if dist.is_initialized():
+        dist.destroy_process_group()
@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from ai.agents.rl_agent import train_self_play, MODEL_PATH
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the RL agent by self-play.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None, help="rollout processes (default: all cores)")
+    parser.add_argument("--games-per-task", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--updates-per-iter", type=int, default=8)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None, help="torch threads for the learner")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--records", default=None, help="game record file whose transitions pre-fill the replay buffer")
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    train_self_play(
+        iterations=args.iterations, workers=args.workers, games_per_task=args.games_per_task,
+        batch_size=args.batch_size, updates_per_iter=args.updates_per_iter, lr=args.lr,
+        snapshot_every=args.snapshot_every, threads=args.threads, seed=args.seed, out_path=args.out,
+        records=args.records,
+    )
+    print(f"RL agent saved to {args.out}")
@@ -0,0 +1,41 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game.briscola import BriscolaGame
+from game.batch import BatchBriscola
+from game.rng import game_rng
+from ai.agents.rule_based import RuleBasedPlayer
+
+"""
+Plays the same game ids through BriscolaGame and BatchBriscola with two
+RuleBasedPlayers and checks that every game ends with identical scores.
+"""
+
+def reference_scores(game_id, base_seed=0):
+    p1 = RuleBasedPlayer("P1")
+    p2 = RuleBasedPlayer("P2")
+    game = BriscolaGame(p1, p2, rng=game_rng(base_seed, game_id))
+    game.play_game()
+    return game.scores["P1"], game.scores["P2"]
+
+def verify(n_games=1000, base_seed=0):
+    game_ids = list(range(n_games))
+    batch = BatchBriscola.from_game_ids(game_ids, base_seed)
+    while not batch.done:
+        batch.play(RuleBasedPlayer.batch_actions(batch.current_hands()))
+
+    mismatches = 0
+    for i, game_id in enumerate(game_ids):
+        expected = reference_scores(game_id, base_seed)
+        got = tuple(int(s) for s in batch.scores[i])
+        if got != expected:
+            mismatches += 1
+            print(f"Game {game_id}: BriscolaGame {expected} vs BatchBriscola {got}")
+
+    print(f"{n_games - mismatches}/{n_games} games match")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if verify() else 1)
@@ -0,0 +1,57 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from game.briscola import BriscolaGame
+from game.events import RingBufferSink
+from game.rng import game_rng
+from ai.agents.model_player import ModelPlayer
+from ai.agents.rule_based import RuleBasedPlayer
+from ai.policy_cache import PolicyCache, build_opening_book
+from ai import registry
+
+"""
+Loads the opening book of a model (<model stem>.cache.npz, written by
+scripts/build_policy_cache.py; built in memory when there is none), plays
+the same deals against RuleBasedPlayer with and without it and checks that
+every game has identical events, i.e. that the book never changes a move.
+The deals come from EVAL_SEED, not from the base seed 0 of the training
+data and evaluation scripts.
+"""
+
+EVAL_SEED = 3_000_017
+
+def play(model, cache, game_id, base_seed):
+    sink = RingBufferSink()
+    player = ModelPlayer(model, "Model_AI", cache=cache)
+    seats = (player, RuleBasedPlayer("Rule")) if game_id % 2 == 0 else (RuleBasedPlayer("Rule"), player)
+    BriscolaGame(*seats, events=sink, rng=game_rng(base_seed, game_id)).play_game()
+    return list(sink)
+
+def load_book(name):
+    model = registry.load(name)
+    path = os.path.splitext(registry.resolve(name)[1])[0] + ".cache.npz"
+    if os.path.exists(path):
+        return model, PolicyCache(capacity=200_000, path=path)
+    print(f"No opening book at {path}: building it in memory")
+    return model, build_opening_book(ModelPlayer(model).evaluate, PolicyCache(capacity=200_000))
+
+def verify(model, cache, n_games=300, base_seed=EVAL_SEED):
+    mismatches = 0
+    for game_id in range(n_games):
+        if play(model, cache, game_id, base_seed) != play(model, None, game_id, base_seed):
+            mismatches += 1
+            print(f"Game {game_id}: moves differ from the uncached game")
+    print(f"{n_games - mismatches}/{n_games} games match | {len(cache):,} book entries, "
+          f"{cache.hits:,} hits, hit rate {cache.hit_rate:.1%}")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that a model's opening book plays the uncached moves.")
+    parser.add_argument("--model", default="trainer")
+    parser.add_argument("--games", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=EVAL_SEED, help="base seed of the deals")
+    args = parser.parse_args()
+    sys.exit(0 if verify(*load_book(args.model), args.games, args.seed) else 1)